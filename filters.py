@@ -0,0 +1,155 @@
+"""Pokemon filters compiled from the request json"""
+import numpy as np
+
+class PokeFilter:
+    """Predicate compiled once per request from the filter json,
+       only the criteria that are actually set are checked"""
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    # one attribute per criterion that can be filtered on
+    __slots__ = ('shiny', 'slot_filter', 'min_slot', 'max_slot', 'slot_total', 'alpha',
+                 'min_ivs', 'max_ivs', 'natures', 'gender', 'gender_ratio', 'ability')
+
+    def __init__(self,
+                 shiny = False,
+                 slot_filter = False,
+                 min_slot = 0,
+                 max_slot = 101,
+                 slot_total = 101,
+                 alpha = False,
+                 min_ivs = None,
+                 max_ivs = None,
+                 natures = None,
+                 gender = None,
+                 gender_ratio = 127,
+                 ability = None):
+        self.shiny = shiny
+        self.slot_filter = slot_filter
+        self.min_slot = min_slot
+        self.max_slot = max_slot
+        self.slot_total = slot_total
+        self.alpha = alpha
+        # iv bounds that cannot reject anything are dropped so they are never checked
+        if min_ivs is not None and not any(min_ivs):
+            min_ivs = None
+        if max_ivs is not None and all(iv >= 31 for iv in max_ivs):
+            max_ivs = None
+        self.min_ivs = tuple(min_ivs) if min_ivs is not None else None
+        self.max_ivs = tuple(max_ivs) if max_ivs is not None else None
+        self.natures = frozenset(natures) if natures else None
+        self.gender = gender
+        self.gender_ratio = gender_ratio
+        self.ability = ability
+
+    @classmethod
+    def from_json(cls, filter_json):
+        """Compile the filter json sent by map.html"""
+        gender = filter_json.get('genderFilter', "Any")
+        ability = filter_json.get('abilityFilter', -1)
+        # an empty iv box is sent as null, it does not bound that iv
+        min_ivs = filter_json.get('minIVs')
+        if min_ivs is not None:
+            min_ivs = [0 if iv is None else iv for iv in min_ivs]
+        max_ivs = filter_json.get('maxIVs')
+        if max_ivs is not None:
+            max_ivs = [31 if iv is None else iv for iv in max_ivs]
+        return cls(shiny = filter_json['shinyFilterCheck'],
+                   slot_filter = filter_json['slotFilterCheck'],
+                   min_slot = filter_json['minSlotFilter'],
+                   max_slot = filter_json['maxSlotFilter'],
+                   slot_total = filter_json['slotTotal'],
+                   alpha = filter_json['outbreakAlphaFilter'],
+                   min_ivs = min_ivs,
+                   max_ivs = max_ivs,
+                   natures = filter_json.get('natureFilter'),
+                   gender = None if gender == "Any" else gender,
+                   gender_ratio = filter_json.get('genderRatio', 127),
+                   ability = None if ability == -1 else ability)
+
+    def with_slots(self, min_slot, max_slot, slot_total):
+        """Copy of the filter restricted to a slot range, used for species filters"""
+        copy = PokeFilter.__new__(PokeFilter)
+        for attribute in PokeFilter.__slots__:
+            setattr(copy, attribute, getattr(self, attribute))
+        copy.slot_filter = True
+        copy.min_slot = min_slot
+        copy.max_slot = max_slot
+        copy.slot_total = slot_total
+        return copy
+
+    @property
+    def key(self):
+        """Hashable representation of every criterion"""
+        return tuple(getattr(self, attribute) for attribute in PokeFilter.__slots__)
+
+    def passes_slot(self, slot):
+        """Check a spawner's slot, the alpha filter accepts the alpha slot of outbreaks"""
+        if self.slot_filter and not self.min_slot <= slot < self.max_slot:
+            return False
+        return not self.alpha or 100 <= slot < 101
+
+    def passes_alpha(self, alpha):
+        """Check whether an outbreak pokemon being alpha passes the filter"""
+        return alpha or not self.alpha
+
+    def passes_shiny(self, shiny):
+        """Check the pid roll, the earliest point a pokemon can be rejected"""
+        return shiny or not self.shiny
+
+    def passes_ivs(self, ivs):
+        """Check every iv against its bounds"""
+        if self.min_ivs is not None:
+            for iv, minimum in zip(ivs, self.min_ivs):
+                if iv < minimum:
+                    return False
+        if self.max_ivs is not None:
+            for iv, maximum in zip(ivs, self.max_ivs):
+                if iv > maximum:
+                    return False
+        return True
+
+    def passes_info(self, ability, gender, nature):
+        """Check the values rolled after the ivs"""
+        if self.ability is not None and ability != self.ability:
+            return False
+        if self.gender is not None and (gender < self.gender_ratio) != (self.gender == "Female"):
+            return False
+        return self.natures is None or nature in self.natures
+
+    def passes(self, shiny, ivs, ability, gender, nature):
+        """Check a fully generated pokemon"""
+        return self.passes_shiny(shiny) \
+           and self.passes_ivs(ivs) \
+           and self.passes_info(ability, gender, nature)
+
+    def slot_mask(self, slots):
+        """passes_slot for an array of slots"""
+        mask = np.ones(len(slots), dtype=bool)
+        if self.slot_filter:
+            mask &= (self.min_slot <= slots) & (slots < self.max_slot)
+        if self.alpha:
+            mask &= (100 <= slots) & (slots < 101)
+        return mask
+
+    def shiny_mask(self, shiny):
+        """passes_shiny for an array of shiny flags"""
+        return shiny if self.shiny else np.ones(len(shiny), dtype=bool)
+
+    def ivs_mask(self, ivs):
+        """passes_ivs for an array of iv rows"""
+        mask = np.ones(len(ivs), dtype=bool)
+        if self.min_ivs is not None:
+            mask &= (ivs >= np.array(self.min_ivs)).all(axis=1)
+        if self.max_ivs is not None:
+            mask &= (ivs <= np.array(self.max_ivs)).all(axis=1)
+        return mask
+
+    def info_mask(self, ability, gender, nature):
+        """passes_info for arrays of abilities, genders and natures"""
+        mask = np.ones(len(ability), dtype=bool)
+        if self.ability is not None:
+            mask &= ability == self.ability
+        if self.gender is not None:
+            mask &= (gender < self.gender_ratio) == (self.gender == "Female")
+        if self.natures is not None:
+            mask &= np.isin(nature, list(self.natures))
+        return mask
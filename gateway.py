@@ -0,0 +1,91 @@
+"""Daemon holding the only connection to sys-botbase and serving it to local processes,
+   run it with ``python3 ./gateway.py`` and set ``Gateway`` in config.json to its socket"""
+import json
+import os
+import socketserver
+import nxreader
+from nxreader import GATEWAY_REQUEST, GATEWAY_RESPONSE, GATEWAY_OK, GATEWAY_ERROR, GATEWAY_RANGE, \
+    recv_exactly
+from scheduler import CommandScheduler
+
+DEFAULT_PATH = "./sysbot.sock"
+
+def dispatch(scheduler, opcode, priority, address, size, payload):
+    """Queue the reader call a request asks for and return the data to answer with"""
+    # pylint: disable=too-many-arguments,too-many-return-statements
+    if opcode == nxreader.OP_COMMAND:
+        scheduler.call(priority, 'send_command', payload.decode())
+        return b""
+    if opcode == nxreader.OP_PEEK:
+        return scheduler.call(priority, 'read', address, size)
+    if opcode == nxreader.OP_POKE:
+        scheduler.call(priority, 'write', address, payload.hex().upper())
+        return b""
+    if opcode == nxreader.OP_PEEK_MAIN:
+        return scheduler.call(priority, 'read_main', address, size)
+    if opcode == nxreader.OP_POKE_MAIN:
+        scheduler.call(priority, 'write_main', address, payload.hex().upper())
+        return b""
+    if opcode == nxreader.OP_POINTER_PEEK:
+        # the address field of pointer reads carries validate
+        return scheduler.call(priority, 'read_pointer', payload.decode(), size,
+                              validate = bool(address))
+    if opcode == nxreader.OP_POINTER_POKE:
+        scheduler.call(priority, 'write_pointer', payload[:size].decode(),
+                       payload[size:].hex().upper())
+        return b""
+    if opcode == nxreader.OP_INVALIDATE:
+        scheduler.call(priority, 'invalidate_pointers')
+        return b""
+    if opcode == nxreader.OP_PEEK_ABSOLUTE_MULTI:
+        return scheduler.call(priority, 'read_absolute_multi',
+                              tuple(GATEWAY_RANGE.iter_unpack(payload)))
+    if opcode == nxreader.OP_POINTER_PEEK_MULTI:
+        return scheduler.call(priority, 'read_pointer_multi', payload[:size].decode(),
+                              tuple(GATEWAY_RANGE.iter_unpack(payload[size:])),
+                              validate = bool(address))
+    raise ValueError(f"Unknown opcode {opcode}")
+
+class GatewayHandler(socketserver.BaseRequestHandler):
+    """Answer the requests of one client connection in order"""
+    def handle(self):
+        while True:
+            try:
+                header = recv_exactly(self.request, GATEWAY_REQUEST.size)
+            except ConnectionError:
+                return
+            opcode, priority, address, size, length = GATEWAY_REQUEST.unpack(header)
+            payload = recv_exactly(self.request, length)
+            try:
+                status = GATEWAY_OK
+                data = dispatch(self.server.scheduler, opcode, priority, address, size, payload)
+            except Exception as error: # pylint: disable=broad-except
+                # reported to the client, the connection to the switch stays up for the others
+                status = GATEWAY_ERROR
+                data = f"{type(error).__name__}: {error}".encode()
+            self.request.sendall(GATEWAY_RESPONSE.pack(status, len(data)) + data)
+
+class Gateway(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server sharing one scheduled sys-botbase connection"""
+    daemon_threads = True
+
+    def __init__(self, path, reader):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.scheduler = CommandScheduler(reader)
+        super().__init__(path, GatewayHandler)
+
+def main():
+    """Connect to the switch and serve it until interrupted"""
+    with open("config.json","r",encoding="utf-8") as config:
+        config = json.load(config)
+    path = config.get("Gateway") or DEFAULT_PATH
+    with Gateway(path, nxreader.NXReader(config["IP"])) as gateway:
+        print(f"Serving sys-botbase on {path}")
+        try:
+            gateway.serve_forever()
+        finally:
+            os.unlink(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Pokemon generation from spawner seeds and the searches for the next advance of each
+   spawner that passes a filter"""
+from concurrent.futures import as_completed
+import numpy as np
+from xoroshiro import XOROSHIRO
+from xoroshiro_vector import XOROSHIROVector, slot_values
+
+def generate_from_seed(seed,rolls,guaranteed_ivs,poke_filter=None):
+    """Generate pokemon information from a fixed seed (FixInitSpec),
+       returns None as soon as a roll fails poke_filter"""
+    rng = XOROSHIRO(seed)
+    encryption_constant = rng.rand(0xFFFFFFFF)
+    sidtid = rng.rand(0xFFFFFFFF)
+    for _ in range(rolls):
+        pid = rng.rand(0xFFFFFFFF)
+        shiny = ((pid >> 16) ^ (sidtid >> 16) ^ (pid & 0xFFFF) ^ (sidtid & 0xFFFF)) < 0x10
+        if shiny:
+            break
+    if poke_filter is not None and not poke_filter.passes_shiny(shiny):
+        return None
+    ivs = [-1,-1,-1,-1,-1,-1]
+    for i in range(guaranteed_ivs):
+        index = rng.rand(6)
+        while ivs[index] != -1:
+            index = rng.rand(6)
+        ivs[index] = 31
+    for i in range(6):
+        if ivs[i] == -1:
+            ivs[i] = rng.rand(32)
+    if poke_filter is not None and not poke_filter.passes_ivs(ivs):
+        return None
+    ability = rng.rand(2)
+    gender = rng.rand(252) + 1
+    nature = rng.rand(25)
+    if poke_filter is not None and not poke_filter.passes_info(ability,gender,nature):
+        return None
+    return encryption_constant,pid,ivs,ability,gender,nature,shiny
+
+def generate_from_seeds(seeds,rolls,guaranteed_ivs,poke_filter=None):
+    """Generate pokemon information from an array of fixed seeds (FixInitSpec) at once,
+       guaranteed_ivs may be a single value or one value per seed.
+       Returns the indices of the seeds that pass poke_filter along with their information,
+       seeds are dropped as soon as a roll fails so later rolls are only made for the rest"""
+    # pylint: disable=too-many-locals
+    rng = XOROSHIROVector(seeds)
+    lanes = np.arange(len(rng))
+    guaranteed_ivs = np.broadcast_to(guaranteed_ivs, lanes.shape)
+    encryption_constant = rng.rand(0xFFFFFFFF)
+    sidtid = rng.rand(0xFFFFFFFF)
+    pid = np.zeros(len(rng), dtype=np.uint64)
+    shiny = np.zeros(len(rng), dtype=bool)
+    for _ in range(rolls):
+        rolling = ~shiny
+        pid = np.where(rolling, rng.rand(0xFFFFFFFF, rolling), pid)
+        shiny = ((pid >> np.uint64(16)) ^ (sidtid >> np.uint64(16))
+                 ^ (pid & np.uint64(0xFFFF)) ^ (sidtid & np.uint64(0xFFFF))) < 0x10
+    if poke_filter is not None:
+        keep = poke_filter.shiny_mask(shiny)
+        rng.compress(keep)
+        lanes,guaranteed_ivs,encryption_constant,pid,shiny = \
+            (array[keep] for array in (lanes,guaranteed_ivs,encryption_constant,pid,shiny))
+    rows = np.arange(len(rng))
+    ivs = np.full((len(rng),6), -1, dtype=np.int64)
+    for i in range(int(guaranteed_ivs.max(initial=0))):
+        pending = guaranteed_ivs > i
+        index = np.zeros(len(rng), dtype=np.int64)
+        while pending.any():
+            index = np.where(pending, rng.rand(6, pending).astype(np.int64), index)
+            pending &= ivs[rows,index] != -1
+        assigning = guaranteed_ivs > i
+        ivs[rows[assigning],index[assigning]] = 31
+    for i in range(6):
+        unset = ivs[:,i] == -1
+        ivs[:,i] = np.where(unset, rng.rand(32, unset).astype(np.int64), ivs[:,i])
+    if poke_filter is not None:
+        keep = poke_filter.ivs_mask(ivs)
+        rng.compress(keep)
+        lanes,encryption_constant,pid,shiny,ivs = \
+            (array[keep] for array in (lanes,encryption_constant,pid,shiny,ivs))
+    ability = rng.rand(2)
+    gender = rng.rand(252) + np.uint64(1)
+    nature = rng.rand(25)
+    if poke_filter is not None:
+        keep = poke_filter.info_mask(ability,gender,nature)
+        lanes,encryption_constant,pid,ivs,ability,gender,nature,shiny = \
+            (array[keep] for array in
+             (lanes,encryption_constant,pid,ivs,ability,gender,nature,shiny))
+    return lanes,encryption_constant,pid,ivs,ability,gender,nature,shiny
+
+def next_filtered_from_seed(generator_seed,
+                            rolls,
+                            guaranteed_ivs,
+                            init_spawn,
+                            poke_filter,
+                            stopping_point=50000):
+    """Find the next advance that matches poke_filter for a spawner's generator seed"""
+    # pylint: disable=too-many-locals,too-many-arguments
+    group_seed = (generator_seed - 0x82A2B175229D6A5B) & 0xFFFFFFFFFFFFFFFF
+    main_rng = XOROSHIRO(group_seed)
+    if not init_spawn:
+        # advance once
+        main_rng.next() # spawner 0
+        main_rng.next() # spawner 1
+        main_rng.reseed(main_rng.next())
+    adv = 0
+    batch_size = 64
+    if poke_filter.slot_total == 0:
+        return -1,-1,-1,-1,[],-1,-1,-1,False
+    while adv <= stopping_point:
+        # step the group rng ahead for a batch of advances and generate every spawner 0
+        # pokemon among them in one vectorised pass
+        count = min(batch_size, stopping_point + 1 - adv)
+        generator_seeds = []
+        for _ in range(count):
+            generator_seeds.append(main_rng.next())
+            main_rng.next() # spawner 1's seed, unused
+            main_rng.reseed(main_rng.next())
+        rng = XOROSHIROVector(generator_seeds)
+        slots = slot_values(rng.next(), poke_filter.slot_total)
+        fixed_seeds = rng.next()
+        # only generate the advances whose slot already passes
+        candidates = np.flatnonzero(poke_filter.slot_mask(slots))
+        lanes,encryption_constants,pids,ivs,abilities,genders,natures,shinies = \
+            generate_from_seeds(fixed_seeds[candidates],rolls,guaranteed_ivs,poke_filter)
+        if len(lanes):
+            i = candidates[lanes[0]]
+            return adv + int(i),float(slots[i]),int(encryption_constants[0]),int(pids[0]), \
+                   ivs[0].tolist(),int(abilities[0]),int(genders[0]),int(natures[0]), \
+                   bool(shinies[0])
+        adv += count
+        batch_size = min(batch_size * 2, 4096)
+    return -2,-1,-1,-1,[],-1,-1,-1,False
+
+def check_spawners(spawners,rolls,init_spawn,stopping_point):
+    """Find the next filtered advance of each (group_id,generator_seed,guaranteed_ivs,poke_filter)
+       in spawners, the unit of work handed to each process of /check-near"""
+    return [(group_id,next_filtered_from_seed(generator_seed,
+                                              rolls,
+                                              guaranteed_ivs,
+                                              init_spawn,
+                                              poke_filter,
+                                              stopping_point)[0])
+            for group_id,generator_seed,guaranteed_ivs,poke_filter in spawners]
+
+def search_spawners(spawners,rolls,init_spawn,stopping_point,executor=None,workers=1):
+    """Run check_spawners over spawners, split across executor's workers processes when there
+       is one, and yield (group_id,advance) as each part finishes"""
+    # pylint: disable=too-many-arguments
+    if executor is None:
+        for spawner in spawners:
+            yield from check_spawners([spawner],rolls,init_spawn,stopping_point)
+        return
+    # several chunks per process so that uneven searches still balance out
+    chunk_size = max(1,len(spawners) // (workers * 4))
+    futures = [executor.submit(check_spawners,
+                               spawners[i:i+chunk_size],
+                               rolls,
+                               init_spawn,
+                               stopping_point)
+               for i in range(0,len(spawners),chunk_size)]
+    try:
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        # a cancelled job or a closed stream stops consuming, drop the chunks still queued
+        for future in futures:
+            future.cancel()
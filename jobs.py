@@ -0,0 +1,104 @@
+"""Background jobs for searches too long to run inside a single request"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from uuid import uuid4
+
+class JobCancelled(Exception):
+    """Raised inside a job's search once it has been cancelled"""
+
+class Job:
+    """State of one background search, updated by the search and read by the status endpoint"""
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, job_id, kind):
+        self.job_id = job_id
+        self.kind = kind
+        self.state = "queued"
+        # fraction of the search done, None when the amount of work is not known in advance
+        self.progress = None
+        self.message = ""
+        self.partial = []
+        self.result = None
+        self.error = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+
+    def update(self, progress = None, message = None):
+        """Report progress, stops the search by raising JobCancelled once it is cancelled"""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        if progress is not None:
+            self.progress = progress
+        if message is not None:
+            self.message = message
+
+    def add_partial(self, item):
+        """Publish a result found before the search is finished"""
+        self.partial.append(item)
+        self.update()
+
+    def cancel(self):
+        """Ask the search to stop at its next progress report"""
+        self.cancel_event.set()
+
+    def status(self, since = 0):
+        """Json-able state, only including partial results from index since on"""
+        return {"id": self.job_id,
+                "kind": self.kind,
+                "state": self.state,
+                "progress": self.progress,
+                "message": self.message,
+                "partialCount": len(self.partial),
+                "partial": self.partial[since:],
+                "result": self.result,
+                "error": self.error}
+
+class JobManager:
+    """Runs searches on a pool of worker threads and keeps their jobs around until they have
+       been finished for a while, jobs only live in the memory of the process that started
+       them"""
+    def __init__(self, workers = 4, keep = 600):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="job")
+        self.keep = keep
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, function, *args):
+        """Start function(*args, job=job) in the background and return its job"""
+        with self.lock:
+            self.prune()
+            # random ids so a job of another server process is never mistaken for this one's
+            job = Job(uuid4().hex, kind)
+            self.jobs[job.job_id] = job
+        self.executor.submit(self.run, job, function, args)
+        return job
+
+    @staticmethod
+    def run(job, function, args):
+        """Run a job's search and record how it ended"""
+        if job.cancel_event.is_set():
+            job.state = "cancelled"
+        else:
+            job.state = "running"
+            try:
+                job.result = function(*args, job=job)
+                job.progress = 1
+                job.state = "done"
+            except JobCancelled:
+                job.state = "cancelled"
+            except Exception as error: # pylint: disable=broad-except
+                # shown to the user instead of being lost in a worker thread
+                job.error = f"{type(error).__name__}: {error}"
+                job.state = "failed"
+        job.finished = time.monotonic()
+
+    def get(self, job_id):
+        """Job with job_id, None if it does not exist (anymore)"""
+        return self.jobs.get(job_id)
+
+    def prune(self):
+        """Forget jobs that finished more than keep seconds ago"""
+        now = time.monotonic()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished is not None and now - job.finished > self.keep:
+                del self.jobs[job_id]
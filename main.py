@@ -1,12 +1,24 @@
 """Flask application to display live memory information from
    PLA onto a map"""
+from concurrent.futures import ProcessPoolExecutor
 import json
-from math import factorial
+import os
 import struct
-import requests
-from flask import Flask, render_template, request
+import numpy as np
+from flask import Flask, Response, render_template, request
 import nxreader
+from filters import PokeFilter
+from generation import generate_from_seed, next_filtered_from_seed, search_spawners
+from jobs import JobManager
+from marker_cache import get_markers
+from outbreak import generate_mass_outbreak, next_filtered_mass_outbreak, \
+                     generate_passive_search_paths, next_filtered_aggressive_outbreak_pathfind
 from pa8 import Pa8
+from result_cache import map_cache
+from results import PokemonResult
+from scheduler import CommandScheduler, INTERACTIVE, BULK
+from slots import slot_index
+from tracking import PositionTracker
 from xoroshiro import XOROSHIRO
 
 with open("./static/resources/text_natures.txt",encoding="utf-8") as text_natures:
@@ -18,6 +30,27 @@ SPAWNER_PTR = "[[main+42a6ee0]+330]"
 PARTY_PTR = "[[[main+42a7000]+d0]+58]"
 WILD_PTR = "[[[[main+42a6f00]+b0]+e0]+d0]"
 OUTBREAK_PTR = "[[[[main+42BA6B0]+2B0]+58]+18]"
+# jumps from a battle slot's pointer to its pokemon, the chain {WILD_PTR}+b0+8*slot]+70]+60]+98]+10]
+BATTLE_SLOT_JUMPS = (0x70,0x60,0x98,0x10)
+# bytes per pointerPeek when pulling large parts of the spawner table
+SPAWNER_CHUNK_SIZE = 0x4000
+# layout of one 0x40 byte entry of the active spawn table at SPAWNER_PTR+70,
+# the seed is read as 12 bytes like the rest of the tool does
+ACTIVE_SPAWN_DTYPE = np.dtype({"names": ["x","y","z","seed","seed_high"],
+                               "formats": ["<f4","<f4","<f4","<u8","<u4"],
+                               "offsets": [0x0,0x4,0x8,0x20,0x28],
+                               "itemsize": 0x40})
+# layout of one 0x440 byte spawner group at SPAWNER_PTR+70, only outbreak groups have a
+# group seed
+SPAWNER_GROUP_DTYPE = np.dtype({"names": ["generator_seed","group_seed"],
+                                "formats": ["<u8","<u8"],
+                                "offsets": [0x20,0x408],
+                                "itemsize": 0x440})
+# layout of one of the 4 0x50 byte mass outbreak entries at OUTBREAK_PTR+20
+OUTBREAK_DTYPE = np.dtype({"names": ["species","spawns"],
+                           "formats": ["<u2","u1"],
+                           "offsets": [0x0,0x40],
+                           "itemsize": 0x50})
 CUSTOM_MARKERS = {
     "obsidianfieldlands": {
         "camp": {
@@ -72,34 +105,32 @@ CUSTOM_MARKERS = {
 }
 
 with open("config.json","r",encoding="utf-8") as config:
-    IP_ADDRESS = json.load(config)["IP"]
+    config = json.load(config)
+    IP_ADDRESS = config["IP"]
+    # unix socket of gateway.py, when set the switch connection is shared through it
+    GATEWAY_PATH = config.get("Gateway")
 
 app = Flask(__name__)
-reader = nxreader.NXReader(IP_ADDRESS)
-
-def generate_from_seed(seed,rolls,guaranteed_ivs):
-    """Generate pokemon information from a fixed seed (FixInitSpec)"""
-    rng = XOROSHIRO(seed)
-    encryption_constant = rng.rand(0xFFFFFFFF)
-    sidtid = rng.rand(0xFFFFFFFF)
-    for _ in range(rolls):
-        pid = rng.rand(0xFFFFFFFF)
-        shiny = ((pid >> 16) ^ (sidtid >> 16) ^ (pid & 0xFFFF) ^ (sidtid & 0xFFFF)) < 0x10
-        if shiny:
-            break
-    ivs = [-1,-1,-1,-1,-1,-1]
-    for i in range(guaranteed_ivs):
-        index = rng.rand(6)
-        while ivs[index] != -1:
-            index = rng.rand(6)
-        ivs[index] = 31
-    for i in range(6):
-        if ivs[i] == -1:
-            ivs[i] = rng.rand(32)
-    ability = rng.rand(2)
-    gender = rng.rand(252) + 1
-    nature = rng.rand(25)
-    return encryption_constant,pid,ivs,ability,gender,nature,shiny
+# worker processes started by the spawn method import this module as __mp_main__,
+# only the web server itself may hold the connection to the switch
+connection = None
+reader = bulk_reader = None
+if __name__ != "__mp_main__":
+    # one click or poll jumps ahead of the remaining reads of a scan
+    if GATEWAY_PATH:
+        reader = nxreader.NXGatewayReader(GATEWAY_PATH,INTERACTIVE)
+        bulk_reader = nxreader.NXGatewayReader(GATEWAY_PATH,BULK)
+    else:
+        connection = CommandScheduler(nxreader.NXReader(IP_ADDRESS))
+        reader = connection.client(INTERACTIVE)
+        bulk_reader = connection.client(BULK)
+# processes used to search spawners in parallel, started on first use
+WORKERS = os.cpu_count() or 1
+executor = ProcessPoolExecutor(WORKERS) if WORKERS > 1 else None
+# threads running searches started through /jobs
+jobs = JobManager()
+# map name -> (outbreak table, located outbreak), reused until the outbreak table changes
+outbreak_locations = {}
 
 @app.route("/")
 def root():
@@ -109,504 +140,236 @@ def root():
 @app.route("/map/<name>")
 def load_map(name):
     """Read markers and generate map based on location"""
-    url = "https://raw.githubusercontent.com/Lincoln-LM/JS-Finder/main/Resources/" \
-         f"pla_spawners/jsons/{name}.json"
-    markers = json.loads(requests.get(url).text)
-    with open(f"./static/resources/{name}.json",encoding="utf-8") as slot_file:
-        slots = json.load(slot_file)
+    # the spawner structures are rebuilt when a different area is loaded
+    reader.invalidate_pointers()
+    markers = get_markers(name)
     return render_template('map.html',
                            markers=markers.values(),
                            map_name=name,
                            custom_markers=json.dumps(CUSTOM_MARKERS[name]),
-                           slots=slots)
-
-def slot_to_pokemon(values,slot):
-    """Compare slot to list of slots to find pokemon"""
-    for pokemon,slot_value in values.items():
-        if slot <= slot_value:
-            return pokemon
-        slot -= slot_value
-    return None
-
-def find_slots(time,weather,sp_slots):
-    """Get slots based on sp_slots, time, and weather"""
-    for time_weather, values in sp_slots.items():
-        slot_time,slot_weather = time_weather.split("/")
-        if (slot_time in ("Any Time", time)) and (slot_weather in ("All Weather", weather)):
-            return values
-    return None
-
-def find_slot_range(time,weather,species,sp_slots):
-    """Find slot range of a species for a spawner"""
-    values = find_slots(time,weather,sp_slots)
-    pokemon = list(values.keys())
-    slot_values = list(values.values())
-    if not species in pokemon:
-        return 0,0,0
-    start = sum(slot_values[:pokemon.index(species)])
-    end = start + values[species]
-    return start,end,sum(slot_values)
-
-def next_filtered(group_id,
+                           natures=json.dumps(NATURES),
+                           slots=slot_index(name).sp_slots)
+
+def next_filtered(map_name,
+                  group_id,
+                  generator_seed,
                   rolls,
                   guaranteed_ivs,
                   init_spawn,
                   poke_filter,
                   stopping_point=50000):
-    """Find the next advance that matches poke_filter for a spawner"""
-    # pylint: disable=too-many-locals,too-many-arguments
-    generator_seed = reader.read_pointer_int(f"{SPAWNER_PTR}"\
-                                             f"+{0x70+group_id*0x440+0x20:X}",8)
-    group_seed = (generator_seed - 0x82A2B175229D6A5B) & 0xFFFFFFFFFFFFFFFF
-    main_rng = XOROSHIRO(group_seed)
-    if not init_spawn:
-        # advance once
-        main_rng.next() # spawner 0
-        main_rng.next() # spawner 1
-        main_rng.reseed(main_rng.next())
-    adv = -1
-    if poke_filter['slotTotal'] == 0:
-        return -1,-1,-1,-1,[],-1,-1,-1,False
-    while True:
-        adv += 1
-        if adv > stopping_point:
-            return -2,-1,-1,-1,[],-1,-1,-1,False
-        generator_seed = main_rng.next()
-        main_rng.next() # spawner 1's seed, unused
-        rng = XOROSHIRO(generator_seed)
-        slot = poke_filter['slotTotal'] * rng.next() / 2**64
-        encryption_constant,pid,ivs,ability,gender,nature,shiny = \
-            generate_from_seed(rng.next(),rolls,guaranteed_ivs)
-        break_flag = ((poke_filter['shinyFilterCheck'] and not shiny)
-                    or poke_filter['slotFilterCheck']
-                       and not (poke_filter['minSlotFilter'] <= slot < poke_filter['maxSlotFilter'])
-                    or poke_filter['outbreakAlphaFilter'] and not 100 <= slot < 101)
-        if not break_flag:
-            break
-        main_rng.reseed(main_rng.next())
-    return adv,slot,encryption_constant,pid,ivs,ability,gender,nature,shiny
-
-def generate_mass_outbreak(main_rng,rolls,spawns,poke_filter):
-    """Generate the current set of a mass outbreak and return a string representing it along with
-       a bool to show if a pokemon passing poke_filter is present"""
-    # pylint: disable=too-many-locals
-    # this many locals is appropriate to display all the information about
-    # the mass outbreak that a user might want
-    display = ""
-    filtered_present = False
-    for init_spawn in range(1,5):
-        generator_seed = main_rng.next()
-        main_rng.next() # spawner 1's seed, unused
-        fixed_rng = XOROSHIRO(generator_seed)
-        slot = (fixed_rng.next() / (2**64) * 101)
-        alpha = slot >= 100
-        fixed_seed = fixed_rng.next()
-        encryption_constant,pid,ivs,ability,gender,nature,shiny = \
-            generate_from_seed(fixed_seed,rolls,3 if alpha else 0)
-        display += f"<b>Init Spawn {init_spawn}</b> <b>Shiny: " \
-                   f"<font color=\"{'green' if shiny else 'red'}\">{shiny}</font></b><br>" \
-                   f"<b>Alpha: <font color=\"{'green' if alpha else 'red'}\">" \
-                   f"{alpha}</font></b><br>" \
-                   f"EC: {encryption_constant:08X} PID: {pid:08X}<br>" \
-                   f"Nature: {NATURES[nature]} Ability: {ability} Gender: {gender}<br>" \
-                   f"{'/'.join(str(iv) for iv in ivs)}<br>"
-        filtered = ((poke_filter['shinyFilterCheck'] and not shiny)
-                  or poke_filter['outbreakAlphaFilter'] and not 100 <= slot < 101)
-        filtered_present |= not filtered
-    group_seed = main_rng.next()
-    main_rng.reseed(group_seed)
-    respawn_rng = XOROSHIRO(group_seed)
-    for respawn in range(1,spawns-3):
-        generator_seed = respawn_rng.next()
-        respawn_rng.next() # spawner 1's seed, unused
-        respawn_rng.reseed(respawn_rng.next())
-        fixed_rng = XOROSHIRO(generator_seed)
-        slot = (fixed_rng.next() / (2**64) * 101)
-        alpha = slot >= 100
-        fixed_seed = fixed_rng.next()
-        encryption_constant,pid,ivs,ability,gender,nature,shiny = \
-            generate_from_seed(fixed_seed,rolls,3 if alpha else 0)
-        display += f"<b>Respawn {respawn}</b> Shiny: " \
-                   f"<b><font color=\"{'green' if shiny else 'red'}\">{shiny}</font></b><br>" \
-                   f"<b>Alpha: <font color=\"{'green' if alpha else 'red'}\">" \
-                   f"{alpha}</font></b><br>" \
-                   f"EC: {encryption_constant:08X} PID: {pid:08X}<br>" \
-                   f"Nature: {NATURES[nature]} Ability: {ability} Gender: {gender}<br>" \
-                   f"{'/'.join(str(iv) for iv in ivs)}<br>"
-        filtered = ((poke_filter['shinyFilterCheck'] and not shiny)
-                  or poke_filter['outbreakAlphaFilter'] and not 100 <= slot < 101)
-        filtered_present |= not filtered
-    return display,filtered_present
-
-def next_filtered_mass_outbreak(main_rng,rolls,spawns,poke_filter):
-    """Find the next pokemon of a mass outbreak that passes poke_filter
-       and return a string representing it"""
-    filtered_present = False
-    advance = 0
-    while not filtered_present:
-        advance += 1
-        display, filtered_present = generate_mass_outbreak(main_rng,rolls,spawns,poke_filter)
-    return f"<b>Advance: {advance}</b><br>{display}"
-
-def generate_mass_outbreak_passive_path(group_seed,
-                                        rolls,
-                                        steps,
-                                        total_spawns,
-                                        poke_filter,
-                                        filtered_results,
-                                        storage):
-    """Generate all the pokemon of an outbreak based on a provided passive path"""
-    # pylint: disable=too-many-locals, too-many-arguments
-    # the generation is unique to each path, no use in splitting this function
-    rng = XOROSHIRO(group_seed)
-    passes_filters = False
-    skip = 0
-    for step_i in range(len(steps),0,-1):
-        path_str = tuple(steps[:step_i])
-        if path_str in storage:
-            rng.reseed(*storage[path_str]) # we've already calculated up to this point
-            skip = step_i
-            break
-    for step_i,step in enumerate(steps[skip:]):
-        step_i += skip
-        path_str = tuple(steps[:step_i+1])
-        left = total_spawns - sum(steps[:step_i+1])
-        final_in_init = (step_i == (len(steps) - 1)) and left + step <= 4
-        all_in_init = (step_i != (len(steps) - 1)) and left <= 4
-        down_to_init = final_in_init or all_in_init
-        if final_in_init:
-            add = 0
-        else:
-            add = min(4,left)
-        for pokemon in range(step + add):
-            spawner_seed = rng.next()
-            spawner_rng = XOROSHIRO(spawner_seed)
-            slot = spawner_rng.next() / (2**64) * 101
-            alpha = slot >= 100
-            fixed_seed = spawner_rng.next()
-            encryption_constant,pid,ivs,ability,gender,nature,shiny = \
-                generate_from_seed(fixed_seed,rolls,3 if alpha else 0)
-            filtered = ((poke_filter['shinyFilterCheck'] and not shiny)
-                    or poke_filter['outbreakAlphaFilter'] and not alpha)
-            passes_filters |= not filtered
-            if not filtered:
-                effective_path = steps[:step_i] + [max(0,pokemon-3)]
-                if fixed_seed in filtered_results["info"] \
-                and effective_path not in filtered_results["paths"][fixed_seed]:
-                    filtered_results["paths"][fixed_seed].append(effective_path)
-                else:
-                    filtered_results["paths"][fixed_seed] = [effective_path]
-                    filtered_results["info"][fixed_seed] = \
-                        f"<b>Shiny: <font color=\"{'green' if shiny else 'red'}\">" \
-                        f"{shiny}</font></b><br>" \
-                        f"<b>Alpha: <font color=\"{'green' if alpha else 'red'}\">" \
-                        f"{alpha}</font></b><br>" \
-                        f"EC: {encryption_constant:08X} PID: {pid:08X}<br>" \
-                        f"Nature: {NATURES[nature]} Ability: {ability} Gender: {gender}<br>" \
-                        f"{'/'.join(str(iv) for iv in ivs)}"
-            rng.next() # spawner 1 seed, unused
-            if not down_to_init and pokemon >= 3:
-                rng.reseed(rng.next())
-        storage[path_str] = rng.seed.copy()
-    return passes_filters
-
-def generate_mass_outbreak_aggressive_path(group_seed,rolls,steps,poke_filter,uniques,storage):
-    """Generate all the pokemon of an outbreak based on a provided aggressive path"""
-    # pylint: disable=too-many-locals, too-many-arguments
-    # the generation is unique to each path, no use in splitting this function
-    main_rng = XOROSHIRO(group_seed)
-    for init_spawn in range(1,5):
-        generator_seed = main_rng.next()
-        main_rng.next() # spawner 1's seed, unused
-        fixed_rng = XOROSHIRO(generator_seed)
-        slot = (fixed_rng.next() / (2**64) * 101)
-        alpha = slot >= 100
-        fixed_seed = fixed_rng.next()
-        encryption_constant,pid,ivs,ability,gender,nature,shiny = \
-            generate_from_seed(fixed_seed,rolls,3 if alpha else 0)
-        filtered = ((poke_filter['shinyFilterCheck'] and not shiny)
-                  or poke_filter['outbreakAlphaFilter'] and not alpha)
-        if not filtered and not fixed_seed in uniques:
-            uniques.add(fixed_seed)
-            storage.append(
-                   f"<b>Init Spawn {init_spawn} Shiny: "
-                   f"<font color=\"{'green' if shiny else 'red'}\">{shiny}</font></b><br>"
-                   f"<b>Alpha: <font color=\"{'green' if alpha else 'red'}\">" \
-                   f"{alpha}</font></b><br>" \
-                   f"EC: {encryption_constant:08X} PID: {pid:08X}<br>"
-                   f"Nature: {NATURES[nature]} Ability: {ability} Gender: {gender}<br>"
-                   f"{'/'.join(str(iv) for iv in ivs)}")
-    group_seed = main_rng.next()
-    respawn_rng = XOROSHIRO(group_seed)
-    for step_i,step in enumerate(steps):
-        for pokemon in range(1,step+1):
-            generator_seed = respawn_rng.next()
-            respawn_rng.next() # spawner 1's seed, unused
-            fixed_rng = XOROSHIRO(generator_seed)
-            slot = (fixed_rng.next() / (2**64) * 101)
-            alpha = slot >= 100
-            fixed_seed = fixed_rng.next()
-            encryption_constant,pid,ivs,ability,gender,nature,shiny = \
-                generate_from_seed(fixed_seed,rolls,3 if alpha else 0)
-            filtered = ((poke_filter['shinyFilterCheck'] and not shiny)
-                      or poke_filter['outbreakAlphaFilter'] and not alpha)
-            if not filtered and not fixed_seed in uniques:
-                uniques.add(fixed_seed)
-                storage.append(
-                   f"<b>Path: {'|'.join(str(s) for s in steps[:step_i]+[pokemon])} " \
-                   f"Spawns: {sum(steps[:step_i]) + pokemon + 4} Shiny: " \
-                   f"<font color=\"{'green' if shiny else 'red'}\">{shiny}</font></b><br>" \
-                   f"<b>Alpha: <font color=\"{'green' if alpha else 'red'}\">" \
-                   f"{alpha}</font></b><br>" \
-                   f"EC: {encryption_constant:08X} PID: {pid:08X}<br>" \
-                   f"Nature: {NATURES[nature]} Ability: {ability} Gender: {gender}<br>" \
-                   f"{'/'.join(str(iv) for iv in ivs)}"
-                )
-        respawn_rng = XOROSHIRO(respawn_rng.next())
-
-def get_final(spawns):
-    """Get the final path that will be generated to know when to stop aggressive recursion"""
-    spawns -= 4
-    path = [4] * (spawns // 4)
-    if spawns % 4 != 0:
-        path.append(spawns % 4)
-    return path
-
-def generate_passive_search_paths(group_seed,
-                                  rolls,
-                                  spawns,
-                                  move_limit,
-                                  poke_filter,
-                                  exhaustive_search):
-    """Passively pathfind to all pokemon that pass poke_filter"""
-    # pylint: disable=too-many-arguments,too-many-locals
-    stack = []
-    filtered_results = {"info": {}, "paths": {}}
-    storage = {}
-
-    work = spawns * (spawns + 3) # impossibly high work
-    total_paths = round(factorial(spawns - 4 + move_limit) \
-                     / (factorial(spawns - 4) * factorial(move_limit)))
-    progress_val = round(total_paths/100) # 1%
-    progress_mask = XOROSHIRO.get_mask(progress_val+1)
-    print(f"Progress update interval {progress_mask} (from {progress_val})")
-
-    counter = 0
-    for i in range(0, spawns + 1):
-        stack.append((spawns - 4 - i, [i])) # remaining spawns, path
-
-    while len(stack) > 0:
-        spawns_left, path = stack.pop(0) # breadth first search
-        if spawns_left <= 0 or len(path) > move_limit:
-            continue
-
-        if not exhaustive_search and len(path) * (spawns + 1) > work:
-            break # results cannot get better
-
-        counter = counter + 1
-        if counter & progress_mask == 0:
-            print(f"Scanned: {counter}/{total_paths} {counter/total_paths*100}%")
-
-        passes_filters = generate_mass_outbreak_passive_path(group_seed,
-                                                             rolls,
-                                                             path,
-                                                             spawns,
-                                                             poke_filter,
-                                                             filtered_results,
-                                                             storage)
-
-        c_work = len(path) * (spawns + 1) + sum(path)
-        if passes_filters and c_work < work:
-            if not exhaustive_search:
-                return filtered_results
-
-        if len(path) == move_limit:
-            continue
-
-        for i in range(0, spawns_left + 1):
-            path_ = path.copy()
-            path_.append(i)
-            stack.append((spawns_left - i, path_))
-    return filtered_results
-
-def aggressive_outbreak_pathfind(group_seed,
-                                 rolls,
-                                 spawns,
-                                 poke_filter,
-                                 step=0,
-                                 steps=None,
-                                 uniques=None,
-                                 storage=None):
-    """Recursively pathfind to possible shinies for the current outbreak via multi battles"""
+    """Find the next advance that matches poke_filter for a spawner,
+       reusing the last search while its generator seed has not changed"""
     # pylint: disable=too-many-arguments
-    # can this algo be improved?
-    if steps is None or uniques is None or storage is None:
-        steps = []
-        uniques = set()
-        storage = []
-    _steps = steps.copy()
-    if step != 0:
-        _steps.append(step)
-    if sum(_steps) + step < spawns - 4:
-        for _step in range(1, min(5, (spawns - 4) - sum(_steps))):
-            if aggressive_outbreak_pathfind(group_seed,
-                                            rolls,
-                                            spawns,
-                                            poke_filter,
-                                            _step,
-                                            _steps,
-                                            uniques,
-                                            storage) is not None:
-                return storage
-    else:
-        _steps.append(spawns - sum(_steps) - 4)
-        generate_mass_outbreak_aggressive_path(group_seed,rolls,_steps,poke_filter,uniques,storage)
-        if _steps == get_final(spawns):
-            return storage
-    return None
-
-def next_filtered_aggressive_outbreak_pathfind(group_seed,rolls,spawns,poke_filter):
-    """Check the next outbreak advances until an aggressive path to a pokemon that
-       passes poke_filter exists"""
-    main_rng = XOROSHIRO(group_seed)
-    result = []
-    advance = -1
-    while len(result) == 0:
-        if advance != -1:
-            for _ in range(4*2):
-                main_rng.next()
-            group_seed = main_rng.next()
-            main_rng.reseed(group_seed)
-        advance += 1
-        result = aggressive_outbreak_pathfind(group_seed, rolls, spawns, poke_filter)
-    info = '<br>'.join(result)
-    return f"<b>Advance: {advance}</b><br>{info}"
+    key = ("seed",int(group_id),generator_seed,rolls,guaranteed_ivs,init_spawn,
+           stopping_point,poke_filter.key)
+    cache = map_cache(map_name)
+    result = cache.get(key)
+    if result is None:
+        result = next_filtered_from_seed(generator_seed,
+                                         rolls,
+                                         guaranteed_ivs,
+                                         init_spawn,
+                                         poke_filter,
+                                         stopping_point)
+        cache.put(key,result)
+    return result
+
+def follow_pointers(addresses,jumps):
+    """Follow the same jumps from every address, one round trip per jump for all of them,
+       null pointers stay 0"""
+    addresses = list(addresses)
+    for jump in jumps:
+        valid = [index for index,address in enumerate(addresses) if address]
+        if not valid:
+            break
+        buf = reader.read_absolute_multi(tuple((addresses[index] + jump,8)
+                                                    for index in valid))
+        for index,address in zip(valid,struct.unpack(f"<{len(valid)}Q",buf)):
+            addresses[index] = address
+    return addresses
+
+def read_battle_pokemon():
+    """Read every pokemon in the current battle, the party's first followed by the wild ones,
+       returns (party count, pokemon) with None for slots that could not be followed"""
+    # the battle structures are rebuilt for every battle, their cached addresses are checked
+    party_count = reader.read_pointer_int(f"{PARTY_PTR}+88",1,validate=True)
+    # 30 slot pointers followed by the number of slots in use
+    slots = reader.read_pointer(f"{WILD_PTR}+b0",0x1a0-0xb0+1,validate=True)
+    count = slots[-1]
+    if count > 30:
+        count = 0
+    addresses = follow_pointers(struct.unpack(f"<{count}Q",slots[:8*count]),BATTLE_SLOT_JUMPS)
+    valid = [index for index,address in enumerate(addresses) if address]
+    pokemon = [None] * count
+    if valid:
+        buf = reader.read_absolute_multi(tuple((addresses[index],Pa8.STOREDSIZE)
+                                                    for index in valid))
+        for index,pkm in zip(valid,Pa8.decode_batch(buf,len(valid))):
+            pokemon[index] = pkm
+    return min(party_count,count),pokemon
+
+def pokemon_json(slot,pkm):
+    """Json-able PokemonResult of a pokemon read from memory and where it is stored, with the
+       extra information only known for those"""
+    form = f"-{pkm.form_index}" if pkm.form_index > 0 else ""
+    record = PokemonResult(pkm.encryption_constant,
+                           pkm.pid,
+                           pkm.ivs,
+                           pkm.ability_string,
+                           pkm.gender,
+                           pkm.nature,
+                           pkm.shiny_type,
+                           slot=slot,
+                           species=f"{SPECIES[pkm.species]}{form}").to_json()
+    record.update({"dex": pkm.species,
+                   "form": pkm.form_index,
+                   "evs": pkm.evs,
+                   "moves": [pkm.move1,pkm.move2,pkm.move3,pkm.move4],
+                   "valid": pkm.is_valid})
+    return record
 
 @app.route('/read-battle', methods=['GET'])
+@app.route('/pokemon/battle', methods=['GET'])
 def read_battle():
-    """Read all battle pokemon and return the information as an html formatted string"""
-    display = ""
-    party_count = reader.read_pointer_int(f"{PARTY_PTR}+88",1)
-    wild_count = reader.read_pointer_int(f"{WILD_PTR}+1a0",1) \
-               - party_count
-    if wild_count > 30:
-        wild_count = 0
-    for i in range(wild_count):
-        pkm = Pa8(reader.read_pointer(f"{WILD_PTR}+{0xb0+8*(i+party_count):X}"\
-                                       "]+70]+60]+98]+10]",Pa8.STOREDSIZE))
-        pokemon_name = f"{SPECIES[pkm.species]}" \
-                       f"{('-' + str(pkm.form_index)) if pkm.form_index > 0 else ''} " \
-                       f"{'' if pkm.shiny_type == 0 else '⋆' if pkm.shiny_type == 1 else '◇'}"
-        pokemon_info = f"EC: {pkm.encryption_constant:08X}<br>" \
-                       f"PID: {pkm.pid:08X}<br>" \
-                       f"Nature: {NATURES[pkm.nature]}<br>" \
-                       f"Ability: {pkm.ability_string}<br>" \
-                       f"IVs: {'/'.join(str(iv) for iv in pkm.ivs)}"
-        if pkm.is_valid:
-            display += f"<button type=\"button\" class=\"collapsible\" " \
-                       f"data-for=\"battle{i}\" onclick=collapsibleOnClick()>{i+1} " \
-                       f"{pokemon_name}</button>" \
-                       f"<div class=\"info\" id=\"battle{i}\">{pokemon_info}</div><br>"
-    return display
-
-@app.route('/read-mass-outbreak', methods=['POST'])
-def read_mass_outbreak():
-    """Read current mass outbreak information and predict next pokemon that passes filter"""
-    url = "https://raw.githubusercontent.com/Lincoln-LM/JS-Finder/main/Resources/" \
-         f"pla_spawners/jsons/{request.json['name']}.json"
-    minimum = int(list(json.loads(requests.get(url).text).keys())[-1])-15
-    group_id = minimum+30
-    group_seed = 0
-    while group_seed == 0 and group_id != minimum:
-        group_id -= 1
-        print(f"Finding group_id {minimum-group_id+30}/30")
-        group_seed = reader.read_pointer_int(f"{SPAWNER_PTR}+{0x70+group_id*0x440+0x408:X}",8)
-    if group_id == minimum:
+    """Wild pokemon of the current battle as json"""
+    party_count, pokemon = read_battle_pokemon()
+    return json.dumps([pokemon_json(slot,pkm) for slot,pkm in enumerate(pokemon[party_count:])
+                       if pkm is not None and pkm.is_valid])
+
+@app.route('/pokemon/party', methods=['GET'])
+def party_pokemon():
+    """Party pokemon as json, read from the battle slots so only available during a battle"""
+    # where PARTY_PTR keeps the party's own slots is not known, only its count at +88
+    party_count, pokemon = read_battle_pokemon()
+    if party_count == 0:
+        return json.dumps({"error": "The party can only be read during a battle"}), 409
+    return json.dumps([pokemon_json(slot,pkm) for slot,pkm in enumerate(pokemon[:party_count])
+                       if pkm is not None and pkm.is_valid])
+
+def locate_outbreak(name):
+    """Find the group id, group seed, species and spawn count of the mass outbreak of a map,
+       None when there is none"""
+    table = bulk_reader.read_pointer(f"{OUTBREAK_PTR}+20",4*OUTBREAK_DTYPE.itemsize,
+                                     validate=True)
+    cached = outbreak_locations.get(name)
+    if cached is not None and cached[0] == table:
+        outbreak = dict(cached[1])
+        generator_seed = reader.read_pointer_int(f"{SPAWNER_PTR}"\
+                                                 f"+{0x70+outbreak['group_id']*0x440+0x20:X}",8,
+                                                 validate=True)
+    else:
+        minimum = int(list(get_markers(name).keys())[-1])-15
+        groups = np.frombuffer(read_spawner_table(0x70+minimum*0x440,30*0x440),
+                               dtype=SPAWNER_GROUP_DTYPE)
+        # the last of the map's groups that has a group seed is the outbreak's
+        found = np.flatnonzero(groups["group_seed"][1:])
+        if len(found) == 0:
+            outbreak_locations.pop(name,None)
+            return None
+        index = int(found[-1]) + 1
+        entries = np.frombuffer(table,dtype=OUTBREAK_DTYPE)
+        valid = np.flatnonzero((10 <= entries["spawns"]) & (entries["spawns"] <= 15))
+        outbreak = {"group_id": minimum+index,
+                    "species": int(entries["species"][valid[0]]) if len(valid) else None,
+                    "spawns": int(entries["spawns"][valid[0]]) if len(valid) else -1}
+        outbreak_locations[name] = (table,dict(outbreak))
+        generator_seed = int(groups["generator_seed"][index])
+    outbreak["group_seed"] = (generator_seed - 0x82A2B175229D6A5B) & 0xFFFFFFFFFFFFFFFF
+    return outbreak
+
+def mass_outbreak_info(options,job=None):
+    """Read current mass outbreak information and predict next pokemon that passes filter,
+       returned as json-able dict of the current spawns and the results of the search"""
+    options = dict(options)
+    outbreak = locate_outbreak(options['name'])
+    if outbreak is None:
         print("No mass outbreak found")
-        return json.dumps(["No mass outbreak found","No mass outbreak found"])
-    print(f"Found group_id {group_id}")
-    generator_seed = reader.read_pointer_int(f"{SPAWNER_PTR}+{0x70+group_id*0x440+0x20:X}",8)
-    group_seed = (generator_seed - 0x82A2B175229D6A5B) & 0xFFFFFFFFFFFFFFFF
-    if request.json['spawns'] == -1:
-        for i in range(4):
-            spawns = reader.read_pointer_int(f"{OUTBREAK_PTR}+{0x60+i*0x50:X}",1)
-            if 10 <= spawns <= 15:
-                request.json['spawns'] = spawns
-                break
-        print(f"Spawns: {request.json['spawns']}")
-    if request.json['aggressivePath']:
-        # should display multiple aggressive paths like whats done with passive
-        display = ["",
-                   f"Group Seed: {group_seed:X}<br>"
-                   + next_filtered_aggressive_outbreak_pathfind(group_seed,
-                                                                request.json['rolls'],
-                                                                request.json['spawns'],
-                                                                request.json['filter'])]
-    elif request.json['passivePath']:
+        return {"error": "No mass outbreak found"}
+    print(f"Found group_id {outbreak['group_id']}")
+    poke_filter = PokeFilter.from_json(options['filter'])
+    group_seed = outbreak['group_seed']
+    if options['spawns'] == -1:
+        options['spawns'] = outbreak['spawns']
+        print(f"Spawns: {options['spawns']}")
+    info = {"groupSeed": f"{group_seed:X}"}
+    if options['aggressivePath']:
+        advance,results = next_filtered_aggressive_outbreak_pathfind(group_seed,
+                                                                     options['rolls'],
+                                                                     options['spawns'],
+                                                                     poke_filter,
+                                                                     job,
+                                                                     executor)
+        if results is None:
+            info["error"] = f"No aggressive paths within {advance} advances"
+            results = []
+    elif options['passivePath']:
         full_info = generate_passive_search_paths(group_seed,
-                              request.json['rolls'],
-                              request.json['spawns'],
-                              request.json['passiveMoveLimit'],
-                              request.json['filter'],
-                              not request.json['passiveFindFirst'])
-        display = ["",f"Group Seed: {group_seed:X}<br>"]
-        if len(full_info["info"]) == 0:
-            display[1] += "<b>No paths found</b>"
-        for seed,info in full_info["info"].items():
-            paths = full_info["paths"][seed]
-            display[1] += "<b>Paths:<br>"
-            for effective_path in paths:
-                display[1] += \
-                    f"{'|'.join(str(effective_step) for effective_step in effective_path)}<br>"
-            display[1] += f"</b>{info}<br>"
+                              options['rolls'],
+                              options['spawns'],
+                              options['passiveMoveLimit'],
+                              poke_filter,
+                              not options['passiveFindFirst'],
+                              job,
+                              executor)
+        results = []
+        for seed,result in full_info["info"].items():
+            result.paths = full_info["paths"][seed]
+            results.append(result)
     else:
         main_rng = XOROSHIRO(group_seed)
-        display = [f"Group Seed: {group_seed:X}<br>"
-                   + generate_mass_outbreak(main_rng,
-                                            request.json['rolls'],
-                                            request.json['spawns'],
-                                            request.json['filter'])[0],
-                   next_filtered_mass_outbreak(main_rng,
-                                               request.json['rolls'],
-                                               request.json['spawns'],
-                                               request.json['filter'])]
-    return json.dumps(display)
+        info["current"] = [result.to_json()
+                           for result in generate_mass_outbreak(main_rng,
+                                                                options['rolls'],
+                                                                options['spawns'],
+                                                                poke_filter)[0]]
+        advance,results = next_filtered_mass_outbreak(main_rng,
+                                                      options['rolls'],
+                                                      options['spawns'],
+                                                      poke_filter,
+                                                      job)
+        if results is None:
+            info["error"] = f"No pokemon passing the filter within {advance} advances"
+            results = []
+    info["results"] = [result.to_json() for result in results]
+    return info
+
+@app.route('/read-mass-outbreak', methods=['POST'])
+def read_mass_outbreak():
+    """Read current mass outbreak information and predict next pokemon that passes filter"""
+    return json.dumps(mass_outbreak_info(request.json))
 
 @app.route('/check-possible', methods=['POST'])
 def check_possible():
     """Check spawners that can spawn a given species"""
     print(request.json)
-    url = "https://raw.githubusercontent.com/Lincoln-LM/JS-Finder/main/Resources/" \
-         f"pla_spawners/jsons/{request.json['name']}.json"
-    markers = json.loads(requests.get(url).text)
+    markers = get_markers(request.json['name'])
+    slots = slot_index(request.json['name'])
     possible = {}
     for group_id, marker in markers.items():
-        with open(f"./static/resources/{request.json['name']}.json",encoding="utf-8") as slot_file:
-            sp_slots = \
-                json.load(slot_file)[marker['name']]
         minimum, maximum, total \
-            = find_slot_range(request.json["filter"]["timeSelect"],
-                              request.json["filter"]["weatherSelect"],
-                              request.json["filter"]["speciesSelect"],
-                              sp_slots)
+            = slots.slot_range(marker['name'],
+                               request.json["filter"]["timeSelect"],
+                               request.json["filter"]["weatherSelect"],
+                               request.json["filter"]["speciesSelect"])
         if total:
             possible[group_id] = (maximum-minimum)/total*100
     return json.dumps(possible)
 
 @app.route('/read-seed', methods=['POST'])
 def read_seed():
-    """Read current information and next advance that passes filter for a spawner"""
+    """Read current information and next advance that passes filter for a spawner as json"""
     # pylint: disable=too-many-locals
     group_id = request.json['groupID']
     thresh = request.json['thresh']
-    url = "https://raw.githubusercontent.com/Lincoln-LM/JS-Finder/main/Resources/" \
-            f"pla_spawners/jsons/{request.json['map']}.json"
-    with open(f"./static/resources/{request.json['map']}.json",encoding="utf-8") as slot_file:
-        sp_slots = \
-            json.load(slot_file)[json.loads(requests.get(url).text)[str(group_id)]['name']]
+    spawner_name = get_markers(request.json['map'])[str(group_id)]['name']
+    slot_table = slot_index(request.json['map']).table(spawner_name,
+                                                       request.json["filter"]["timeSelect"],
+                                                       request.json["filter"]["weatherSelect"])
     generator_seed = reader.read_pointer_int(f"{SPAWNER_PTR}"\
-                                             f"+{0x70+group_id*0x440+0x20:X}",8)
+                                             f"+{0x70+group_id*0x440+0x20:X}",8,validate=True)
     group_seed = (generator_seed - 0x82A2B175229D6A5B) & 0xFFFFFFFFFFFFFFFF
+    poke_filter = PokeFilter.from_json(request.json['filter'])
     rng = XOROSHIRO(group_seed)
     if not request.json['initSpawn']:
         # advance once
@@ -614,52 +377,35 @@ def read_seed():
         rng.next() # spawner 1
         rng.reseed(rng.next()) # reseed group rng
     rng.reseed(rng.next()) # use spawner 0 to reseed
-    slot = rng.next() / (2**64) * request.json['filter']['slotTotal']
+    slot = rng.next() / (2**64) * poke_filter.slot_total
     fixed_seed = rng.next()
-    encryption_constant,pid,ivs,ability,gender,nature,shiny \
-        = generate_from_seed(fixed_seed,request.json['rolls'],request.json['ivs'])
-    species = slot_to_pokemon(find_slots(request.json["filter"]["timeSelect"],
-                                         request.json["filter"]["weatherSelect"],
-                                         sp_slots),slot)
-    display = f"Generator Seed: {generator_seed:X}<br>" \
-              f"Species: {species}<br>" \
-              f"Shiny: <font color=\"{'green' if shiny else 'red'}\"><b>{shiny}</b></font><br>" \
-              f"EC: {encryption_constant:X} PID: {pid:X}<br>" \
-              f"Nature: {NATURES[nature]} Ability: {ability} Gender: {gender}<br>" \
-              f"{'/'.join(str(iv) for iv in ivs)}<br>"
+    current = PokemonResult.from_info(generate_from_seed(fixed_seed,
+                                                         request.json['rolls'],
+                                                         request.json['ivs']),
+                                      slot=slot,
+                                      species=slot_table.pokemon(slot))
     if request.json['filter']['filterSpeciesCheck']:
-        request.json['filter']['minSlotFilter'], \
-        request.json['filter']['maxSlotFilter'], \
-        request.json['filter']['slotTotal'] \
-            = find_slot_range(request.json["filter"]["timeSelect"],
-                              request.json["filter"]["weatherSelect"],
-                              request.json["filter"]["speciesSelect"],
-                              sp_slots)
-        request.json['filter']['slotFilterCheck'] = True
-    adv,slot,encryption_constant,pid,ivs,ability,gender,nature,shiny \
-        = next_filtered(group_id,
-                        request.json['rolls'],
-                        request.json['ivs'],
-                        request.json['initSpawn'],
-                        request.json['filter'])
+        poke_filter = poke_filter.with_slots(
+            *slot_table.slot_range(request.json["filter"]["speciesSelect"]))
+    adv,slot,*info = next_filtered(request.json['map'],
+                                   group_id,
+                                   generator_seed,
+                                   request.json['rolls'],
+                                   request.json['ivs'],
+                                   request.json['initSpawn'],
+                                   poke_filter)
     if adv == -1:
-        return "Impossible slot filters for this spawner"
+        return json.dumps({"error": "Impossible slot filters for this spawner"})
     if adv == -2:
-        return "No results before limit (50000)"
-    if adv <= thresh:
-        display += f"Next Filtered: <font color=\"green\"><b>{adv}</b></font><br>"
-    else:
-        display += f"Next Filtered: {adv} <br>"
-
-    species = slot_to_pokemon(find_slots(request.json["filter"]["timeSelect"],
-                                         request.json["filter"]["weatherSelect"],
-                                         sp_slots),slot)
-    display += f"Species: {species}<br>" \
-               f"Shiny: <font color=\"{'green' if shiny else 'red'}\"><b>{shiny}</b></font><br>" \
-               f"EC: {encryption_constant:X} PID: {pid:X}<br>" \
-               f"Nature: {NATURES[nature]} Ability: {ability} Gender: {gender}<br>" \
-               f"{'/'.join(str(iv) for iv in ivs)}<br>"
-    return display
+        return json.dumps({"error": "No results before limit (50000)"})
+    following = PokemonResult.from_info(info,
+                                        slot=slot,
+                                        species=slot_table.pokemon(slot),
+                                        advance=adv)
+    return json.dumps({"generatorSeed": f"{generator_seed:X}",
+                       "current": current.to_json(),
+                       "next": following.to_json(),
+                       "near": adv <= thresh})
 
 @app.route('/teleport', methods=['POST'])
 def teleport():
@@ -668,12 +414,20 @@ def teleport():
     print(f"Teleporting to {coordinates}")
     position_bytes = struct.pack('fff', *coordinates)
     reader.write_pointer(PLAYER_LOCATION_PTR,f"{int.from_bytes(position_bytes,'big'):024X}")
+    tracker.wake()
     return ""
 
+def read_player_position():
+    """Read the players current position as x,y,z"""
+    return struct.unpack('fff', reader.read_pointer(PLAYER_LOCATION_PTR,12))
+
+# one poller shared by every tab tracking the player
+tracker = PositionTracker(read_player_position)
+
 @app.route('/read-coords', methods=['GET'])
 def read_coords():
     """Read the players current position"""
-    pos = struct.unpack('fff', reader.read_pointer(PLAYER_LOCATION_PTR,12))
+    pos = read_player_position()
     coords = {
         "x":pos[0],
         "y":pos[1],
@@ -681,67 +435,165 @@ def read_coords():
     }
     return json.dumps(coords)
 
+@app.route('/player-position', methods=['GET'])
+def player_position():
+    """Stream the players position to the client whenever it changes"""
+    return Response(tracker.updates(),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache"})
+
+def read_spawner_table(offset,size,validate=True):
+    """Read size bytes of the spawner table starting at offset in a few large reads, checking
+       the cached address of the table first unless validate is False"""
+    return b"".join(bulk_reader.read_pointer(f"{SPAWNER_PTR}+{offset+start:X}",
+                                             min(SPAWNER_CHUNK_SIZE,size-start),
+                                             validate=validate and start == 0)
+                    for start in range(0,size,SPAWNER_CHUNK_SIZE))
+
 @app.route('/update-positions', methods=['GET'])
 def update_positions():
     """Scan all active spawns"""
     spawns = {}
-    size = reader.read_pointer_int(f"{SPAWNER_PTR}+18",4)
+    size = reader.read_pointer_int(f"{SPAWNER_PTR}+18",4,validate=True)
     size = int(size//0x40 - 1)
     print(f"Checking up to index {size}")
-    for index in range(0,size):
-        if index % int(size//100) == 0:
-            print(f"{index/size*100}% done scanning")
-        position_bytes = reader.read_pointer(f"{SPAWNER_PTR}+{0x70+index*0x40:X}",12)
-        seed = reader.read_pointer_int(f"{SPAWNER_PTR}+{0x90+index*0x40:X}",12)
-        pos = struct.unpack('fff', position_bytes)
-        if not (seed == 0 or pos[0] < 1 or pos[1] < 1 or pos[2] < 1):
-            print(f"Active: spawner_id {index} {pos[0]},{pos[1]},{pos[2]} {seed:X}")
-            spawns[str(index)] = {"x":pos[0],
-                                  "y":pos[1],
-                                  "z":pos[2],
-                                  "seed":seed}
+    table = np.frombuffer(read_spawner_table(0x70,size*0x40,validate=False),
+                          dtype=ACTIVE_SPAWN_DTYPE)
+    active = ~((table["seed"] == 0) & (table["seed_high"] == 0)
+               | (table["x"] < 1) | (table["y"] < 1) | (table["z"] < 1))
+    for index in np.flatnonzero(active):
+        pos = (float(table["x"][index]),float(table["y"][index]),float(table["z"][index]))
+        seed = int(table["seed"][index]) | (int(table["seed_high"][index]) << 64)
+        print(f"Active: spawner_id {index} {pos[0]},{pos[1]},{pos[2]} {seed:X}")
+        spawns[str(index)] = {"x":pos[0],
+                              "y":pos[1],
+                              "z":pos[2],
+                              "seed":seed}
     return json.dumps(spawns)
 
-@app.route('/check-near', methods=['POST'])
-def check_near():
-    """Check all spawners' nearest advance that passes filters to update icons"""
+def read_group_seeds(group_ids):
+    """Read only the generator seed of every group, a few round trips for all of them"""
+    buf = bulk_reader.read_pointer_multi(SPAWNER_PTR,
+                                         tuple((0x70+group_id*0x440+0x20,8)
+                                               for group_id in group_ids),
+                                         validate=True)
+    return dict(zip(group_ids,struct.unpack(f"<{len(group_ids)}Q",buf)))
+
+def near_spawner_advances(options):
+    """Check all spawners' nearest advance that passes filters,
+       yielding (group_id,advance) as soon as each one is known"""
     # pylint: disable=too-many-locals
     # store these locals before the loop to avoid accessing dictionary items repeatedly
-    thresh = request.json['thresh']
-    name = request.json['name']
-    url = "https://raw.githubusercontent.com/Lincoln-LM/JS-Finder/main/Resources/" \
-         f"pla_spawners/jsons/{name}.json"
-    markers = json.loads(requests.get(url).text)
-    maximum = list(markers.keys())[-1]
-    near = []
-    poke_filter = request.json['filter']
-    time = request.json["filter"]["timeSelect"]
-    weather = request.json["filter"]["weatherSelect"]
-    species = request.json["filter"]["speciesSelect"]
-    with open(f"./static/resources/{name}.json",encoding="utf-8") as slot_file:
-        slots = json.load(slot_file)
+    name = options['name']
+    markers = get_markers(name)
+    base_filter = PokeFilter.from_json(options['filter'])
+    poke_filter = base_filter
+    time = options["filter"]["timeSelect"]
+    weather = options["filter"]["weatherSelect"]
+    species = options["filter"]["speciesSelect"]
+    slots = slot_index(name)
+    # read every seed first so the searches can run in parallel without the switch
+    print(f"Reading {len(markers)} group seeds")
+    seeds = read_group_seeds([int(group_id) for group_id in markers])
+    cache = map_cache(name)
+    keys = {}
+    spawners = []
+    checked = 0
     for group_id, marker in markers.items():
-        if poke_filter['filterSpeciesCheck']:
-            sp_slots = slots[markers[str(group_id)]['name']]
-            poke_filter['minSlotFilter'], \
-            poke_filter['maxSlotFilter'], \
-            poke_filter['slotTotal'] \
-                = find_slot_range(time,
-                                weather,
-                                species,
-                                sp_slots)
-            poke_filter['slotFilterCheck'] = True
-        print(f"Checking group_id {group_id}/{maximum}")
-        adv,_,_,_,_,_,_,_,_ = \
-            next_filtered(int(group_id),
-                                request.json['rolls'],
-                                marker["ivs"],
-                                request.json['initSpawn'],
-                                poke_filter,
-                                stopping_point=thresh)
+        if options['filter']['filterSpeciesCheck']:
+            poke_filter = base_filter.with_slots(*slots.slot_range(marker['name'],
+                                                                   time,
+                                                                   weather,
+                                                                   species))
+        keys[group_id] = ("near",int(group_id),seeds[int(group_id)],options['rolls'],
+                          marker["ivs"],options['initSpawn'],options['thresh'],poke_filter.key)
+        adv = cache.get(keys[group_id])
+        if adv is None:
+            spawners.append((group_id,seeds[int(group_id)],marker["ivs"],poke_filter))
+        else:
+            # the seed has not changed since this spawner was last searched
+            checked += 1
+            yield group_id,adv,checked,len(markers)
+    print(f"Searching {len(spawners)}/{len(markers)} changed spawners")
+    for group_id,adv in search_spawners(spawners,
+                                        options['rolls'],
+                                        options['initSpawn'],
+                                        options['thresh'],
+                                        executor,
+                                        WORKERS):
+        cache.put(keys[group_id],adv)
+        checked += 1
+        print(f"Checked group_id {group_id} ({checked}/{len(markers)})")
+        yield group_id,adv,checked,len(markers)
+
+def near_spawners(options,job=None):
+    """Check all spawners' nearest advance that passes filters"""
+    thresh = options['thresh']
+    near = set()
+    for group_id,adv,checked,total in near_spawner_advances(options):
         if 0 <= adv <= thresh:
-            near.append(group_id)
-    return json.dumps(near)
+            near.add(group_id)
+            if job is not None:
+                job.add_partial(group_id)
+        if job is not None:
+            job.update(progress=checked/total)
+    return [group_id for group_id in get_markers(options['name']) if group_id in near]
+
+@app.route('/check-near', methods=['POST'])
+def check_near():
+    """Check all spawners' nearest advance that passes filters to update icons"""
+    return json.dumps(near_spawners(request.json))
+
+@app.route('/check-near-stream', methods=['POST'])
+def check_near_stream():
+    """Stream each spawner's nearest advance that passes filters as a json line
+       as soon as it is known, followed by the list of near spawners"""
+    options = request.json
+    def lines():
+        near = set()
+        for group_id,adv,checked,total in near_spawner_advances(options):
+            if 0 <= adv <= options['thresh']:
+                near.add(group_id)
+            yield json.dumps({"groupID": group_id,
+                              "advance": adv,
+                              "near": group_id in near,
+                              "checked": checked,
+                              "total": total}) + "\n"
+        yield json.dumps({"done": True,
+                          "near": [group_id for group_id in get_markers(options['name'])
+                                   if group_id in near]}) + "\n"
+    return Response(lines(),mimetype="application/x-ndjson")
+
+@app.route('/jobs/<kind>', methods=['POST'])
+def submit_job(kind):
+    """Start a long search in the background and return its job id"""
+    if kind not in JOB_KINDS:
+        return json.dumps({"error": f"Unknown job {kind}"}), 404
+    job = jobs.submit(kind,JOB_KINDS[kind],request.json)
+    return json.dumps({"id": job.job_id})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Progress, partial results and final result of a job"""
+    job = jobs.get(job_id)
+    if job is None:
+        return json.dumps({"error": "Unknown job"}), 404
+    return json.dumps(job.status(int(request.args.get('since',0))))
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Stop a job at its next progress report"""
+    job = jobs.get(job_id)
+    if job is None:
+        return json.dumps({"error": "Unknown job"}), 404
+    job.cancel()
+    return json.dumps(job.status(len(job.partial)))
+
+# searches that can be run as jobs
+JOB_KINDS = {
+    "read-mass-outbreak": mass_outbreak_info,
+    "check-near": near_spawners,
+}
 
 if __name__ == '__main__':
     app.run(host="localhost", port=8080, debug=True)
@@ -0,0 +1,102 @@
+"""Session and on-disk cache of the spawner marker json published by JS-Finder"""
+import json
+import os
+import sys
+from glob import glob
+import requests
+
+MARKER_URL = "https://raw.githubusercontent.com/Lincoln-LM/JS-Finder/main/Resources/" \
+             "pla_spawners/jsons/{name}.json"
+CACHE_DIR = "./cache/markers"
+SLOT_DIR = "./static/resources"
+# seconds to wait on github before falling back to the copy on disk
+REQUEST_TIMEOUT = 5
+
+# map name -> parsed markers, filled on first use and never refetched within the session
+_markers = {}
+
+def _paths(name):
+    return os.path.join(CACHE_DIR, f"{name}.json"), os.path.join(CACHE_DIR, f"{name}.meta.json")
+
+def _read_disk(name):
+    """Load the stored copy of a map's markers and its validators, (None, {}) if there is none"""
+    data_path, meta_path = _paths(name)
+    if not os.path.exists(data_path):
+        return None, {}
+    with open(data_path, "rb") as data_file:
+        data = data_file.read()
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+    return data, meta
+
+def _write_disk(name, data, meta):
+    """Store a map's markers along with the validators github sent for them"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    data_path, meta_path = _paths(name)
+    # write then rename so an interrupted download never leaves a truncated copy behind
+    with open(data_path + ".tmp", "wb") as data_file:
+        data_file.write(data)
+    os.replace(data_path + ".tmp", data_path)
+    with open(meta_path, "w", encoding="utf-8") as meta_file:
+        json.dump(meta, meta_file)
+
+def fetch_markers(name, revalidate = True):
+    """Get the raw marker json of a map from disk, asking github whether it changed first
+       when revalidate is set, only downloading it again if it did"""
+    data, meta = _read_disk(name)
+    if data is not None and not revalidate:
+        return data
+    headers = {}
+    if data is not None:
+        if "etag" in meta:
+            headers["If-None-Match"] = meta["etag"]
+        if "last_modified" in meta:
+            headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        response = requests.get(MARKER_URL.format(name=name),
+                                headers=headers,
+                                timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as error:
+        if data is None:
+            raise
+        print(f"Could not revalidate markers for {name}, using stored copy ({error})")
+        return data
+    if response.status_code == 304 and data is not None:
+        return data
+    if response.status_code != 200:
+        if data is None:
+            response.raise_for_status()
+        print(f"Could not revalidate markers for {name}, using stored copy "
+              f"(HTTP {response.status_code})")
+        return data
+    meta = {}
+    if "ETag" in response.headers:
+        meta["etag"] = response.headers["ETag"]
+    if "Last-Modified" in response.headers:
+        meta["last_modified"] = response.headers["Last-Modified"]
+    _write_disk(name, response.content, meta)
+    return response.content
+
+def get_markers(name):
+    """Markers of a map keyed by group id, only the first call of a session for each map can
+       touch the network"""
+    markers = _markers.get(name)
+    if markers is None:
+        markers = _markers[name] = json.loads(fetch_markers(name))
+    return markers
+
+def map_names():
+    """Every map that has slot data"""
+    return sorted(os.path.splitext(os.path.basename(path))[0]
+                  for path in glob(os.path.join(SLOT_DIR, "*.json")))
+
+def preload(names = None):
+    """Download or revalidate the markers of every map so later sessions can run offline"""
+    for name in names or map_names():
+        print(f"Caching markers for {name}")
+        fetch_markers(name)
+
+if __name__ == "__main__":
+    preload(sys.argv[1:])
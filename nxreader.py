@@ -1,16 +1,54 @@
 """Simplified class to read information from sys-botbase
    https://github.com/Lincoln-LM/PyNXReader"""
 import socket
+import struct
 import binascii
-from time import sleep
+import threading
+from time import monotonic, sleep
+
+# framing of the local gateway protocol, see gateway.py
+# request: opcode, priority, address, size, payload length followed by the payload
+GATEWAY_REQUEST = struct.Struct("<BBQII")
+# response: status, payload length followed by the data read or an error message
+GATEWAY_RESPONSE = struct.Struct("<BI")
+GATEWAY_OK = 0
+GATEWAY_ERROR = 1
+(OP_COMMAND, OP_PEEK, OP_POKE, OP_PEEK_MAIN, OP_POKE_MAIN,
+ OP_POINTER_PEEK, OP_POINTER_POKE, OP_INVALIDATE, OP_PEEK_ABSOLUTE_MULTI,
+ OP_POINTER_PEEK_MULTI) = range(10)
+# one address and size of an OP_PEEK_ABSOLUTE_MULTI or OP_POINTER_PEEK_MULTI payload
+GATEWAY_RANGE = struct.Struct("<QI")
+# ranges sent per peekMulti, keeping each command well inside sys-botbase's line buffer
+MULTI_CHUNK_SIZE = 64
+
+def recv_exactly(sock, size):
+    """Receive exactly size bytes from a stream socket"""
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionAbortedError("gateway closed the connection")
+        received += count
+    return bytes(data)
 
 class NXReader:
     """Simplified class to read information from sys-botbase"""
-    def __init__(self, ip_address = None, port = 6000):
+    def __init__(self, ip_address = None, port = 6000, timeout = 10, pointer_lifetime = 5):
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.settimeout(1)
         self.socket.connect((ip_address, port))
         print('Connected')
+        # overall deadline in seconds for a single response to fully arrive
+        self.timeout = timeout
+        # reused for every response, grown when a larger read is requested
+        self.buffer = bytearray(0x1000)
+        self.buffered = 0
+        # pointer chain -> (heap address it resolves to, time it was last validated)
+        self.pointer_cache = {}
+        # seconds a resolved chain is trusted before it is resolved again and compared
+        self.pointer_lifetime = pointer_lifetime
         self.ls_lastx = 0
         self.ls_lasty = 0
         self.rs_lastx = 0
@@ -23,11 +61,63 @@ class NXReader:
     def send_command(self,content):
         """Send a command to sys-botbase on the switch"""
         content += '\r\n' #important for the parser on the switch side
+        self.socket.settimeout(self.timeout)
         self.socket.sendall(content.encode())
 
     def recv(self,size):
         """Receive response from sys-botbase"""
-        return binascii.unhexlify(self.socket.recv(2 * size + 1)[0:-1])
+        end = self.recv_line(2 * size + 1)
+        try:
+            # decode straight out of the receive buffer before the response is consumed
+            return binascii.unhexlify(memoryview(self.buffer)[:end])
+        finally:
+            # a malformed response is dropped too instead of prefixing the next one
+            self.consume(end + 1)
+
+    def recv_line(self,expected = 0):
+        """Wait until a full newline terminated response is in the buffer or the deadline has
+           passed and return the position of the newline"""
+        deadline = monotonic() + self.timeout
+        if len(self.buffer) < expected:
+            self.buffer.extend(bytes(expected - len(self.buffer)))
+        newline = self.buffer.find(b"\n", 0, self.buffered)
+        try:
+            while newline == -1:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"sys-botbase did not respond within {self.timeout}s")
+                if self.buffered == len(self.buffer):
+                    self.buffer.extend(bytes(len(self.buffer)))
+                self.socket.settimeout(remaining)
+                received = self.socket.recv_into(memoryview(self.buffer)[self.buffered:])
+                if received == 0:
+                    raise ConnectionAbortedError("sys-botbase closed the connection")
+                searched = self.buffered
+                self.buffered += received
+                newline = self.buffer.find(b"\n", searched, self.buffered)
+        except TimeoutError:
+            self.drain()
+            raise
+        return newline
+
+    def drain(self):
+        """Drop the partial response left by a timeout along with anything else that has
+           already arrived, so it is not read as the start of the next response"""
+        self.buffered = 0
+        self.socket.setblocking(False)
+        try:
+            while self.socket.recv_into(self.buffer):
+                pass
+        except BlockingIOError:
+            pass
+        finally:
+            self.socket.settimeout(self.timeout)
+
+    def consume(self,size):
+        """Drop size bytes of handled response from the front of the buffer"""
+        leftover = self.buffered - size
+        self.buffer[:leftover] = self.buffer[size:self.buffered]
+        self.buffered = leftover
 
     def close(self):
         """Close connection to switch"""
@@ -76,7 +166,6 @@ class NXReader:
     def read(self,address,size,filename = None):
         """Read bytes from heap"""
         self.send_command(f'peek 0x{address:X} 0x{size:X}')
-        sleep(size/0x8000)
         buf = self.recv(size)
         if filename is not None:
             if filename == '':
@@ -93,10 +182,16 @@ class NXReader:
         """Write data to heap"""
         self.send_command(f'poke 0x{address:X} 0x{data}')
 
+    def read_absolute_multi(self,ranges):
+        """Read every (address, size) of ranges from absolute addresses in one round trip,
+           returned back to back"""
+        self.send_command('peekAbsoluteMulti '
+                          + ' '.join(f'0x{address:X} 0x{size:X}' for address,size in ranges))
+        return self.recv(sum(size for _,size in ranges))
+
     def read_main(self,address,size,filename = None):
         """Read bytes from main"""
         self.send_command(f'peekMain 0x{address:X} 0x{size:X}')
-        sleep(size/0x8000)
         buf = self.recv(size)
         if filename is not None:
             if filename == '':
@@ -113,12 +208,53 @@ class NXReader:
         """Write data to main"""
         self.send_command(f'pokeMain 0x{address:X} 0x{data}')
 
-    def read_pointer(self,pointer,size,filename = None):
-        """Read bytes from pointer"""
-        jumps = pointer.replace("[","").replace("main","").split("]")
-        command = f'pointerPeek 0x{size:X} 0x{" 0x".join(jump.replace("+","") for jump in jumps)}'
-        self.send_command(command)
-        sleep(size/0x8000)
+    @staticmethod
+    def parse_pointer(pointer):
+        """Split a pointer string into its chain of jumps and the final offset"""
+        jumps = [int(jump.replace("+","") or "0",16)
+                 for jump in pointer.replace("[","").replace("main","").split("]")]
+        return tuple(jumps[:-1]), jumps[-1]
+
+    def resolve_pointer(self,chain):
+        """Have sys-botbase follow a chain of jumps and return the heap address it ends at"""
+        self.send_command(f'pointerRelative 0x{" 0x".join(f"{jump:X}" for jump in chain)} 0x0')
+        end = self.recv_line(17)
+        try:
+            return int(bytes(memoryview(self.buffer)[:end]),16)
+        finally:
+            self.consume(end + 1)
+
+    def pointer_address(self,pointer,validate = False):
+        """Heap address of pointer, resolving its chain only when it is not cached or the
+           cached address is due to be validated, returns None for chains outside of the heap"""
+        chain, offset = self.parse_pointer(pointer)
+        cached = self.pointer_cache.get(chain)
+        now = monotonic()
+        if cached is None or validate or now - cached[1] > self.pointer_lifetime:
+            address = self.resolve_pointer(chain)
+            if not 0 < address < 1 << 63:
+                # a null jump, an unresolved chain (0) or one ending in main memory,
+                # leave it to pointerPeek
+                self.pointer_cache.pop(chain,None)
+                return None
+            if cached is not None and cached[0] != address:
+                print(f"Pointer {pointer} moved from 0x{cached[0]:X} to 0x{address:X}")
+            cached = self.pointer_cache[chain] = (address, now)
+        return cached[0] + offset
+
+    def invalidate_pointers(self):
+        """Forget every resolved pointer, to be called when the game reloads its structures"""
+        self.pointer_cache.clear()
+
+    def read_pointer(self,pointer,size,filename = None,validate = False):
+        """Read bytes from pointer, resolving it again first when validate is set"""
+        address = self.pointer_address(pointer,validate)
+        if address is not None:
+            self.send_command(f'peek 0x{address:X} 0x{size:X}')
+        else:
+            jumps = pointer.replace("[","").replace("main","").split("]")
+            self.send_command(f'pointerPeek 0x{size:X} '
+                              f'0x{" 0x".join(jump.replace("+","") for jump in jumps)}')
         buf = self.recv(size)
         if filename is not None:
             if filename == '':
@@ -127,12 +263,35 @@ class NXReader:
                 file_out.write(buf)
         return buf
 
-    def read_pointer_int(self,pointer,size,filename = None):
+    def read_pointer_int(self,pointer,size,filename = None,validate = False):
         """Read integer from pointer"""
-        return int.from_bytes(self.read_pointer(pointer,size,filename = filename),'little')
+        return int.from_bytes(self.read_pointer(pointer,size,filename = filename,
+                                                validate = validate),'little')
+
+    def read_pointer_multi(self,pointer,ranges,validate = False):
+        """Read every (offset, size) of ranges from the address of pointer in as few round
+           trips as possible, returned back to back"""
+        address = self.pointer_address(pointer,validate)
+        if address is None:
+            return b"".join(self.read_pointer(f"{pointer}+{offset:X}",size)
+                            for offset,size in ranges)
+        ranges = tuple(ranges)
+        buf = bytearray()
+        for start in range(0,len(ranges),MULTI_CHUNK_SIZE):
+            chunk = ranges[start:start+MULTI_CHUNK_SIZE]
+            self.send_command('peekMulti '
+                              + ' '.join(f'0x{address+offset:X} 0x{size:X}'
+                                         for offset,size in chunk))
+            buf += self.recv(sum(size for _,size in chunk))
+        return bytes(buf)
 
     def write_pointer(self,pointer,data):
         """Write data to pointer"""
+        # a write through a stale address would corrupt whatever lives there now
+        address = self.pointer_address(pointer,validate = True)
+        if address is not None:
+            self.send_command(f'poke 0x{address:X} 0x{data}')
+            return
         jumps = pointer.replace("[","").replace("main","").split("]")
         command = f'pointerPoke 0x{data} 0x{" 0x".join(jump.replace("+","") for jump in jumps)}'
         self.send_command(command)
@@ -141,3 +300,95 @@ class NXReader:
     def pause(duration):
         """Pause connection to switch"""
         sleep(duration)
+
+class NXGatewayReader(NXReader):
+    """Client mode of NXReader that sends its reads and writes to the gateway daemon holding
+       the only connection to sys-botbase instead of connecting to the switch itself"""
+    # pylint: disable=super-init-not-called
+    # the switch connection set up by NXReader lives in the gateway
+    def __init__(self, path, priority = 0, timeout = 10):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(path)
+        # requests of one client are answered in order, threads take turns
+        self.lock = threading.Lock()
+        self.priority = priority
+        self.ls_lastx = 0
+        self.ls_lasty = 0
+        self.rs_lastx = 0
+        self.rs_lasty = 0
+
+    def request(self, opcode, address = 0, size = 0, payload = b""):
+        """Send one request to the gateway and return the data it answers with"""
+        with self.lock:
+            self.socket.sendall(GATEWAY_REQUEST.pack(opcode, self.priority, address, size,
+                                                     len(payload)) + payload)
+            status, length = GATEWAY_RESPONSE.unpack(recv_exactly(self.socket,
+                                                                   GATEWAY_RESPONSE.size))
+            data = recv_exactly(self.socket, length)
+        if status != GATEWAY_OK:
+            raise ConnectionError(f"Gateway: {data.decode()}")
+        return data
+
+    @staticmethod
+    def save(buf, filename, default):
+        """Dump bytes read to filename like NXReader does"""
+        if filename is not None:
+            with open(filename or default,'wb') as file_out:
+                file_out.write(buf)
+        return buf
+
+    def send_command(self,content):
+        """Send a command to sys-botbase through the gateway"""
+        self.request(OP_COMMAND, payload = content.encode())
+
+    def close(self):
+        """Close connection to the gateway"""
+        self.socket.close()
+
+    def read(self,address,size,filename = None):
+        """Read bytes from heap"""
+        return self.save(self.request(OP_PEEK, address, size), filename,
+                         f'dump_heap_0x{address:X}_0x{size:X}.bin')
+
+    def write(self,address,data):
+        """Write data to heap"""
+        self.request(OP_POKE, address, payload = bytes.fromhex(data))
+
+    def read_absolute_multi(self,ranges):
+        """Read every (address, size) of ranges from absolute addresses in one round trip"""
+        return self.request(OP_PEEK_ABSOLUTE_MULTI,
+                            size = sum(size for _,size in ranges),
+                            payload = b"".join(GATEWAY_RANGE.pack(*pair) for pair in ranges))
+
+    def read_main(self,address,size,filename = None):
+        """Read bytes from main"""
+        return self.save(self.request(OP_PEEK_MAIN, address, size), filename,
+                         f'dump_heap_0x{address:X}_0x{size:X}.bin')
+
+    def write_main(self,address,data):
+        """Write data to main"""
+        self.request(OP_POKE_MAIN, address, payload = bytes.fromhex(data))
+
+    def read_pointer(self,pointer,size,filename = None,validate = False):
+        """Read bytes from pointer, resolving it again first when validate is set"""
+        # the address field of pointer reads carries validate
+        return self.save(self.request(OP_POINTER_PEEK, int(validate), size,
+                                      pointer.encode()),
+                         filename, f'dump_heap_{pointer}_0x{size:X}.bin')
+
+    def read_pointer_multi(self,pointer,ranges,validate = False):
+        """Read every (offset, size) of ranges from the address of pointer"""
+        pointer = pointer.encode()
+        return self.request(OP_POINTER_PEEK_MULTI, int(validate), len(pointer),
+                            payload = pointer + b"".join(GATEWAY_RANGE.pack(*pair)
+                                                         for pair in ranges))
+
+    def write_pointer(self,pointer,data):
+        """Write data to pointer"""
+        pointer = pointer.encode()
+        self.request(OP_POINTER_POKE, size = len(pointer), payload = pointer + bytes.fromhex(data))
+
+    def invalidate_pointers(self):
+        """Have the gateway forget every resolved pointer"""
+        self.request(OP_INVALIDATE)
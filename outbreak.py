@@ -0,0 +1,547 @@
+"""Mass outbreak generation and the passive and aggressive path searches through them"""
+from array import array
+from concurrent.futures import as_completed
+import heapq
+from itertools import islice, repeat
+from math import factorial
+import time
+import numpy as np
+from generation import generate_from_seed, generate_from_seeds
+from results import PokemonResult
+from xoroshiro import XOROSHIRO
+from xoroshiro_vector import XOROSHIROVector
+
+# plain outbreak advances searched before giving up, and the seconds allowed for them
+OUTBREAK_ADVANCE_LIMIT = 100000
+OUTBREAK_TIME_BUDGET = 5
+# most rng states kept per path length by the passive search, 16 bytes each,
+# paths beyond it are regenerated from the group seed when they are extended
+PASSIVE_STATE_LIMIT = 1 << 22
+# aggressive paths shown, searching stops at AGGRESSIVE_ADVANCE_LIMIT once any are found
+AGGRESSIVE_PATH_COUNT = 10
+AGGRESSIVE_ADVANCE_LIMIT = 10
+# advances searched without finding any path before giving up, and the seconds allowed for them
+AGGRESSIVE_SEARCH_LIMIT = 1000
+AGGRESSIVE_TIME_BUDGET = 30
+# advances searched per round when split across processes
+AGGRESSIVE_BATCH = 16
+
+def generate_mass_outbreak(main_rng,rolls,spawns,poke_filter):
+    """Generate the current set of a mass outbreak and return a PokemonResult for each spawn along
+       with a bool to show if a pokemon passing poke_filter is present"""
+    results = []
+    filtered_present = False
+    for init_spawn in range(1,5):
+        generator_seed = main_rng.next()
+        main_rng.next() # spawner 1's seed, unused
+        fixed_rng = XOROSHIRO(generator_seed)
+        slot = (fixed_rng.next() / (2**64) * 101)
+        alpha = slot >= 100
+        fixed_seed = fixed_rng.next()
+        result = PokemonResult.from_info(generate_from_seed(fixed_seed,rolls,3 if alpha else 0),
+                                         alpha=alpha,
+                                         spawn=init_spawn)
+        results.append(result)
+        filtered_present |= poke_filter.passes_alpha(alpha) \
+                        and poke_filter.passes(result.shiny,result.ivs,result.ability,
+                                               result.gender,result.nature)
+    group_seed = main_rng.next()
+    main_rng.reseed(group_seed)
+    respawn_rng = XOROSHIRO(group_seed)
+    for respawn in range(1,spawns-3):
+        generator_seed = respawn_rng.next()
+        respawn_rng.next() # spawner 1's seed, unused
+        respawn_rng.reseed(respawn_rng.next())
+        fixed_rng = XOROSHIRO(generator_seed)
+        slot = (fixed_rng.next() / (2**64) * 101)
+        alpha = slot >= 100
+        fixed_seed = fixed_rng.next()
+        # respawns are numbered on from the 4 initial spawns
+        result = PokemonResult.from_info(generate_from_seed(fixed_seed,rolls,3 if alpha else 0),
+                                         alpha=alpha,
+                                         spawn=4 + respawn)
+        results.append(result)
+        filtered_present |= poke_filter.passes_alpha(alpha) \
+                        and poke_filter.passes(result.shiny,result.ivs,result.ability,
+                                               result.gender,result.nature)
+    return results,filtered_present
+
+def next_filtered_mass_outbreak(main_rng,
+                                rolls,
+                                spawns,
+                                poke_filter,
+                                job=None,
+                                advance_limit=OUTBREAK_ADVANCE_LIMIT,
+                                time_budget=OUTBREAK_TIME_BUDGET):
+    """Find the next advance of a mass outbreak with a pokemon that passes poke_filter
+       and return it along with the PokemonResults of its spawns, giving up after
+       advance_limit advances or time_budget seconds with the advances searched and None"""
+    # pylint: disable=too-many-arguments,too-many-locals
+    deadline = time.monotonic() + time_budget
+    # the 4 initial spawns followed by the respawns
+    columns = 4 + max(0, spawns - 4)
+    advance = 1
+    batch_size = 64
+    while advance <= advance_limit:
+        # each advance's 4 initial spawner seeds come from 9 group rng outputs, take them
+        # for a batch of advances and generate those spawns together
+        count = min(batch_size, advance_limit + 1 - advance)
+        states = []
+        generator_seeds = np.empty((count, columns), dtype=np.uint64)
+        for i in range(count):
+            states.append(main_rng.seed)
+            outputs = main_rng.next_n(9)
+            generator_seeds[i,:4] = outputs[0:8:2]
+            main_rng.reseed(outputs[8])
+        # every outbreak's respawns start from the group seed of the next advance
+        respawn_rng = XOROSHIROVector([state[0] for state in states[1:]] + [main_rng.seed0])
+        for column in range(4, columns):
+            generator_seeds[:,column] = respawn_rng.next()
+            respawn_rng.next() # spawner 1's seed, unused
+            respawn_rng = XOROSHIROVector(respawn_rng.next())
+        fixed_rng = XOROSHIROVector(generator_seeds.ravel())
+        alpha = fixed_rng.next().astype(np.float64) / 2.0 ** 64 * 101 >= 100
+        fixed_seeds = fixed_rng.next()
+        candidates = np.flatnonzero(alpha) if poke_filter.alpha else np.arange(len(alpha))
+        lanes = generate_from_seeds(fixed_seeds[candidates],
+                                    rolls,
+                                    np.where(alpha[candidates], 3, 0),
+                                    poke_filter)[0]
+        if len(lanes):
+            i = int(candidates[lanes[0]]) // columns
+            results = generate_mass_outbreak(XOROSHIRO(*states[i]),rolls,spawns,poke_filter)[0]
+            for result in results:
+                result.advance = advance + i
+            return advance + i,results
+        advance += count
+        batch_size = min(batch_size * 2, 4096)
+        if job is not None:
+            job.update(progress=min(1,(advance - 1)/advance_limit),
+                       message=f"Advance {advance - 1}")
+        if time.monotonic() > deadline:
+            break
+    return advance - 1,None
+
+def generate_mass_outbreak_passive_path(rng,
+                                        rolls,
+                                        steps,
+                                        total_spawns,
+                                        poke_filter,
+                                        filtered_results,
+                                        job=None):
+    """Generate the pokemon of the final step of a passive path with rng in the state the
+       path's prefix left it in, advancing rng to the state its extensions start from,
+       without a poke_filter rng is only advanced, new pokemon are published to job"""
+    # pylint: disable=too-many-locals, too-many-arguments
+    # the generation is unique to each path, no use in splitting this function
+    passes_filters = False
+    step = steps[-1]
+    left = total_spawns - sum(steps)
+    # every shorter prefix has already been generated, only the final step is left
+    down_to_init = left + step <= 4
+    add = 0 if down_to_init else min(4,left)
+    for pokemon in range(step + add):
+        spawner_seed = rng.next()
+        if poke_filter is not None:
+            spawner_rng = XOROSHIRO(spawner_seed)
+            slot = spawner_rng.next() / (2**64) * 101
+            alpha = slot >= 100
+            fixed_seed = spawner_rng.next()
+            info = generate_from_seed(fixed_seed,rolls,3 if alpha else 0,poke_filter) \
+                if poke_filter.passes_alpha(alpha) else None
+            passes_filters |= info is not None
+            if info is not None:
+                effective_path = steps[:-1] + [max(0,pokemon-3)]
+                if fixed_seed in filtered_results["info"]:
+                    if effective_path not in filtered_results["paths"][fixed_seed]:
+                        filtered_results["paths"][fixed_seed].append(effective_path)
+                else:
+                    filtered_results["paths"][fixed_seed] = [effective_path]
+                    filtered_results["info"][fixed_seed] = PokemonResult.from_info(info,
+                                                                                   alpha=alpha)
+                    if job is not None:
+                        job.add_partial(filtered_results["info"][fixed_seed].to_json())
+        rng.next() # spawner 1 seed, unused
+        if not down_to_init and pokemon >= 3:
+            rng.reseed(rng.next())
+    return passes_filters
+
+class PassivePathLevel:
+    """Every passive path of one length, stored as arrays indexed by position in the breadth
+       first order, a path is its step appended to the path at its parent index one level up"""
+    __slots__ = ('parents', 'steps', 'left', 'seed0', 'seed1', 'stored')
+
+    def __init__(self):
+        self.parents = array('I')
+        self.steps = array('B')
+        self.left = array('B')
+        # rng state after each path, only kept while the next level is being generated
+        self.seed0 = array('Q')
+        self.seed1 = array('Q')
+        self.stored = 0
+
+    def __len__(self):
+        return len(self.steps)
+
+    def free_states(self):
+        """Drop the rng states once every extension of this level has been generated"""
+        self.seed0 = array('Q')
+        self.seed1 = array('Q')
+
+def passive_path(levels,depth,index,base=()):
+    """Rebuild the steps of path index of levels[depth], base being the steps before the
+       first level"""
+    path = []
+    while depth >= 0:
+        level = levels[depth]
+        path.append(level.steps[index])
+        index = level.parents[index]
+        depth -= 1
+    path.reverse()
+    return list(base) + path
+
+def passive_prefix_rng(group_seed,rolls,prefix,spawns):
+    """RNG in the state a passive path leaves it in, generated from the group seed"""
+    rng = XOROSHIRO(group_seed)
+    # each prefix is generated as the path it was when it was first searched
+    for length in range(1,len(prefix)+1):
+        generate_mass_outbreak_passive_path(rng,rolls,list(prefix[:length]),spawns,None,None)
+    return rng
+
+def passive_path_rng(group_seed,rolls,levels,depth,index,spawns,base=()):
+    """RNG in the state path index of levels[depth] leaves it in, regenerating the path when
+       its state could not be kept under the memory limit"""
+    # pylint: disable=too-many-arguments
+    if depth < 0:
+        return passive_prefix_rng(group_seed,rolls,base,spawns)
+    if index < levels[depth].stored:
+        return XOROSHIRO(levels[depth].seed0[index],levels[depth].seed1[index])
+    return passive_prefix_rng(group_seed,rolls,passive_path(levels,depth,index,base),spawns)
+
+def merge_passive_results(filtered_results,shard_results):
+    """Add the results of one part of a passive search, deduplicated by fixed seed"""
+    for seed,info in shard_results["info"].items():
+        if seed in filtered_results["info"]:
+            paths = filtered_results["paths"][seed]
+            paths.extend(path for path in shard_results["paths"][seed] if path not in paths)
+        else:
+            filtered_results["info"][seed] = info
+            filtered_results["paths"][seed] = shard_results["paths"][seed]
+
+def passive_search(group_seed,
+                   rolls,
+                   spawns,
+                   move_limit,
+                   poke_filter,
+                   prefix=(),
+                   job=None,
+                   state_limit=PASSIVE_STATE_LIMIT):
+    """Breadth first search of every passive path to pokemon that pass poke_filter,
+       or only of the paths starting with prefix, the unit of work of each process"""
+    # pylint: disable=too-many-arguments,too-many-locals
+    filtered_results = {"info": {}, "paths": {}}
+
+    total_paths = round(factorial(spawns - 4 + move_limit) \
+                     / (factorial(spawns - 4) * factorial(move_limit)))
+    progress_val = round(total_paths/100) # 1%
+    progress_mask = XOROSHIRO.get_mask(progress_val+1)
+    if not prefix:
+        print(f"Progress update interval {progress_mask} (from {progress_val})")
+
+    counter = 0
+    base = prefix[:-1]
+    # breadth first search, one level per path length
+    levels = []
+    for _ in range(len(base), move_limit):
+        previous = levels[-1] if levels else None
+        level = PassivePathLevel()
+        levels.append(level)
+        depth = len(levels) - 1
+        # the last level is never extended so its rng states are never read
+        last_level = len(base) + depth == move_limit - 1
+        for parent in range(len(previous)) if previous is not None else (0,):
+            if previous is not None:
+                parent_left = previous.left[parent]
+                steps = range(0, parent_left + 1)
+            else:
+                # the first step also has to leave the 4 initial spawns
+                parent_left = spawns - 4 - sum(base)
+                steps = prefix[-1:] if prefix else range(0, parent_left + 5)
+            rng_state = None
+            for step in steps:
+                spawns_left = parent_left - step
+                if spawns_left <= 0:
+                    continue
+
+                counter = counter + 1
+                if counter & progress_mask == 0:
+                    if not prefix:
+                        print(f"Scanned: {counter}/{total_paths} {counter/total_paths*100}%")
+                    if job is not None:
+                        job.update(progress=min(1,counter/total_paths),
+                                   message=f"Scanned: {counter}/{total_paths}")
+
+                if rng_state is None:
+                    rng_state = passive_path_rng(group_seed,rolls,levels,depth-1,parent,
+                                                 spawns,base).seed
+                rng = XOROSHIRO(*rng_state)
+                level.parents.append(parent)
+                level.steps.append(step)
+                level.left.append(spawns_left)
+                generate_mass_outbreak_passive_path(rng,
+                                                    rolls,
+                                                    passive_path(levels,depth,len(level)-1,base),
+                                                    spawns,
+                                                    poke_filter,
+                                                    filtered_results,
+                                                    job)
+                if not last_level and level.stored == len(level) - 1 \
+                        and level.stored < state_limit:
+                    level.seed0.append(rng.seed0)
+                    level.seed1.append(rng.seed1)
+                    level.stored += 1
+        if previous is not None:
+            previous.free_states()
+    return filtered_results
+
+def parallel_passive_search(group_seed,rolls,spawns,move_limit,poke_filter,executor,job=None):
+    """passive_search split across processes on the first two steps of each path, the single
+       step paths are searched here while the processes work"""
+    # pylint: disable=too-many-arguments,too-many-locals
+    prefixes = [(first,second)
+                for first in range(spawns - 4)
+                for second in range(spawns - 4 - first)]
+    # the paths that leave the most spawns have the largest trees, start them first
+    futures = {executor.submit(passive_search,
+                               group_seed,
+                               rolls,
+                               spawns,
+                               move_limit,
+                               poke_filter,
+                               prefix): prefix
+               for prefix in sorted(prefixes,key=sum)}
+    filtered_results = passive_search(group_seed,rolls,spawns,1,poke_filter)
+    shard_results = {}
+    published = set(filtered_results["info"])
+    if job is not None:
+        for info in filtered_results["info"].values():
+            job.add_partial(info.to_json())
+    try:
+        for done,future in enumerate(as_completed(futures)):
+            shard_results[futures[future]] = future.result()
+            print(f"Scanned: {done+1}/{len(prefixes)} path prefixes")
+            if job is not None:
+                for seed,info in shard_results[futures[future]]["info"].items():
+                    if seed not in published:
+                        published.add(seed)
+                        job.add_partial(info.to_json())
+                job.update(progress=(done+1)/len(prefixes),
+                           message=f"Scanned: {done+1}/{len(prefixes)} path prefixes")
+    finally:
+        for future in futures:
+            future.cancel()
+    # merged in path order so the result does not depend on which process finished first
+    for prefix in prefixes:
+        merge_passive_results(filtered_results,shard_results[prefix])
+    return filtered_results
+
+def generate_passive_search_paths(group_seed,
+                                  rolls,
+                                  spawns,
+                                  move_limit,
+                                  poke_filter,
+                                  exhaustive_search,
+                                  job=None,
+                                  executor=None):
+    """Passively pathfind to all pokemon that pass poke_filter, or only to the ones on the
+       cheapest path that reaches any of them when not exhaustive_search"""
+    # pylint: disable=too-many-arguments
+    if not exhaustive_search:
+        return cheapest_passive_path(group_seed,rolls,spawns,move_limit,poke_filter,job)
+    if executor is not None and move_limit > 1:
+        filtered_results = parallel_passive_search(group_seed,
+                                                   rolls,
+                                                   spawns,
+                                                   move_limit,
+                                                   poke_filter,
+                                                   executor,
+                                                   job)
+    else:
+        filtered_results = passive_search(group_seed,rolls,spawns,move_limit,poke_filter,job=job)
+    return sort_passive_results(filtered_results,spawns)
+
+def sort_passive_results(filtered_results,spawns):
+    """Order the pokemon by their cheapest path and each pokemon's paths by cost, so the
+       result is the same however the search was split"""
+    def path_key(path):
+        return passive_path_cost(path,spawns),path
+    paths = {seed: sorted(seed_paths,key=path_key)
+             for seed,seed_paths in filtered_results["paths"].items()}
+    order = sorted(paths,key=lambda seed: (*path_key(paths[seed][0]),seed))
+    return {"info": {seed: filtered_results["info"][seed] for seed in order},
+            "paths": {seed: paths[seed] for seed in order}}
+
+def passive_path_cost(path,spawns):
+    """Cost of walking a passive path, every move outweighs any number of battles"""
+    return len(path) * (spawns + 1) + sum(path)
+
+def cheapest_passive_path(group_seed,rolls,spawns,move_limit,poke_filter,job=None):
+    """Best first search for the cheapest passive path to a pokemon that passes poke_filter"""
+    # pylint: disable=too-many-arguments,too-many-locals
+    filtered_results = {"info": {}, "paths": {}}
+    total_paths = round(factorial(spawns - 4 + move_limit) \
+                     / (factorial(spawns - 4) * factorial(move_limit)))
+    # (cost, path, spawns left, rng state before the path's final step)
+    # extending a path never lowers its cost, so its own cost is an admissible bound for
+    # everything below it and the first path popped that passes is the cheapest one
+    start = XOROSHIRO(group_seed).seed
+    heap = [(passive_path_cost((step,),spawns),(step,),spawns - 4 - step,*start)
+            for step in range(0, spawns + 1) if spawns - 4 - step > 0]
+    heapq.heapify(heap)
+    # progress is reported about once per 1% of the paths
+    progress_mask = XOROSHIRO.get_mask(round(total_paths/100)+1)
+    counter = 0
+    while heap:
+        cost,path,spawns_left,seed0,seed1 = heapq.heappop(heap)
+        counter += 1
+        if job is not None and counter & progress_mask == 0:
+            job.update(progress=min(1,counter/total_paths),
+                       message=f"Scanned: {counter}/{total_paths} (cost {cost})")
+        rng = XOROSHIRO(seed0,seed1)
+        if generate_mass_outbreak_passive_path(rng,
+                                               rolls,
+                                               list(path),
+                                               spawns,
+                                               poke_filter,
+                                               filtered_results,
+                                               job):
+            print(f"Found path {'|'.join(str(step) for step in path)} with cost {cost} "
+                  f"after scanning {counter}/{total_paths}")
+            return filtered_results
+        if len(path) == move_limit:
+            continue
+        for step in range(0, spawns_left):
+            child = path + (step,)
+            heapq.heappush(heap,(cost + spawns + 1 + step,child,spawns_left - step,
+                                 rng.seed0,rng.seed1))
+    return filtered_results
+
+def aggressive_pokemon(generator_seed,rolls,poke_filter):
+    """Fixed seed, alpha and generated info of a spawn, info is None when it fails poke_filter"""
+    fixed_rng = XOROSHIRO(generator_seed)
+    slot = (fixed_rng.next() / (2**64) * 101)
+    alpha = slot >= 100
+    fixed_seed = fixed_rng.next()
+    info = generate_from_seed(fixed_seed,rolls,3 if alpha else 0,poke_filter) \
+        if poke_filter.passes_alpha(alpha) else None
+    return fixed_seed,alpha,info
+
+def aggressive_outbreak_search(group_seed,rolls,spawns,poke_filter):
+    """Depth first search of the aggressive paths of one outbreak for pokemon that pass
+       poke_filter, returned as (battles, spawns, path, fixed seed, alpha, info) sorted
+       cheapest first, with the cheapest path that reaches each pokemon"""
+    # pylint: disable=too-many-locals
+    hits = {}
+    def record(path,spawn,generator_seed):
+        fixed_seed,alpha,info = aggressive_pokemon(generator_seed,rolls,poke_filter)
+        if info is None:
+            return
+        hit = (len(path),spawn,path,fixed_seed,alpha,info)
+        if fixed_seed not in hits or hit < hits[fixed_seed]:
+            hits[fixed_seed] = hit
+
+    main_rng = XOROSHIRO(group_seed)
+    for init_spawn in range(1,5):
+        record((),init_spawn,main_rng.next())
+        main_rng.next() # spawner 1's seed, unused
+    total = spawns - 4
+    # (battles so far, rng state the next battle starts from)
+    stack = [((),XOROSHIRO(main_rng.next()).seed)]
+    while stack:
+        path,state = stack.pop()
+        left = total - sum(path)
+        if left <= max(path[-1] if path else 0, 1):
+            # the final battle takes every spawn that is left
+            battles = ()
+            count = left
+        else:
+            battles = range(1, min(5, left))
+            count = battles[-1]
+        # a battle of n spawns generates the first n of the same seeds whatever n is,
+        # so every battle from this state is generated at once from one rng
+        rng = XOROSHIRO(*state)
+        outputs = [rng.next() for _ in range(2*count + 1)]
+        for pokemon in range(1,count+1):
+            record(path + (pokemon,),sum(path) + pokemon + 4,outputs[2*pokemon - 2])
+        for battle in reversed(battles):
+            stack.append((path + (battle,),XOROSHIRO(outputs[2*battle]).seed))
+    return sorted(hits.values())
+
+def aggressive_hit_result(advance,hit):
+    """PokemonResult of an aggressive search result at advance"""
+    _,spawn,path,_,alpha,info = hit
+    return PokemonResult.from_info(info,
+                                   alpha=alpha,
+                                   spawn=spawn,
+                                   path=list(path) if path else None,
+                                   advance=advance)
+
+def outbreak_group_seeds(group_seed):
+    """Group seed of the outbreak at each advance, starting with the current one"""
+    main_rng = XOROSHIRO(group_seed)
+    while True:
+        yield group_seed
+        main_rng.next_n(4*2)
+        group_seed = main_rng.next()
+        main_rng.reseed(group_seed)
+
+def aggressive_advance_searches(group_seed,rolls,spawns,poke_filter,executor=None):
+    """Results of aggressive_outbreak_search for each advance, searched a batch of
+       advances at a time across processes when executor is given"""
+    seeds = outbreak_group_seeds(group_seed)
+    if executor is None:
+        for seed in seeds:
+            yield aggressive_outbreak_search(seed,rolls,spawns,poke_filter)
+    while True:
+        yield from executor.map(aggressive_outbreak_search,
+                                list(islice(seeds,AGGRESSIVE_BATCH)),
+                                repeat(rolls),
+                                repeat(spawns),
+                                repeat(poke_filter))
+
+def next_filtered_aggressive_outbreak_pathfind(group_seed,
+                                               rolls,
+                                               spawns,
+                                               poke_filter,
+                                               job=None,
+                                               executor=None,
+                                               path_count=AGGRESSIVE_PATH_COUNT,
+                                               advance_limit=AGGRESSIVE_ADVANCE_LIMIT,
+                                               search_limit=AGGRESSIVE_SEARCH_LIMIT,
+                                               time_budget=AGGRESSIVE_TIME_BUDGET):
+    """Check the next outbreak advances for aggressive paths to pokemon that pass
+       poke_filter, until path_count are found or advance_limit is passed with at least one,
+       and return the advances searched along with the PokemonResults of the cheapest of
+       them, None when there are none within search_limit advances or time_budget seconds"""
+    # pylint: disable=too-many-arguments
+    deadline = time.monotonic() + time_budget
+    results = []
+    searched = 0
+    for advance,hits in enumerate(aggressive_advance_searches(group_seed,
+                                                              rolls,
+                                                              spawns,
+                                                              poke_filter,
+                                                              executor)):
+        if job is not None:
+            job.update(message=f"Advance {advance}: {len(results)}/{path_count} paths")
+            for hit in hits:
+                job.add_partial(aggressive_hit_result(advance,hit).to_json())
+        results.extend((advance,hit) for hit in hits)
+        searched = advance + 1
+        if len(results) >= path_count or (results and advance >= advance_limit):
+            break
+        if not results and (searched >= search_limit or time.monotonic() > deadline):
+            return searched,None
+    if not results:
+        return searched,None
+    return searched,[aggressive_hit_result(found,hit) for found,hit in results[:path_count]]
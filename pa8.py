@@ -1,37 +1,98 @@
 """PLA Pokemon Format"""
+import struct
+import numpy as np
+
+U64 = struct.Struct("<Q")
+U32 = struct.Struct("<I")
+U16 = struct.Struct("<H")
+
+def lcg_keystream(words):
+    """Multipliers and increments taking the encryption seed straight to each of the first
+       words states of the lcg, so the whole keystream is generated at once"""
+    multipliers = np.empty(words, dtype=np.uint64)
+    increments = np.empty(words, dtype=np.uint64)
+    multiplier, increment = 1, 0
+    for word in range(words):
+        multiplier = (multiplier * 0x41C64E6D) & 0xFFFFFFFF
+        increment = (increment * 0x41C64E6D + 0x6073) & 0xFFFFFFFF
+        multipliers[word] = multiplier
+        increments[word] = increment
+    return multipliers, increments
 class ByteStruct:
-    """Object to represent a structure of bytes"""
+    """Object to represent a structure of bytes, read in place without copying the buffer"""
+    __slots__ = ('data',)
+
     def __init__(self,buf):
-        self.data = bytearray(buf[:])
+        self.data = memoryview(buf)
+
+    def position(self,offset):
+        """Position of a field's bytes in data"""
+        return offset
 
     def get_ulong(self,offset):
         """Pull u64 from bytes"""
-        return int.from_bytes(self.data[offset:offset + 8], byteorder='little') 
+        return U64.unpack_from(self.data, self.position(offset))[0]
 
     def get_uint(self,offset):
         """Pull u32 from bytes"""
-        return int.from_bytes(self.data[offset:offset + 4], byteorder='little')
+        return U32.unpack_from(self.data, self.position(offset))[0]
 
     def get_ushort(self,offset):
         """Pull u16 from bytes"""
-        return int.from_bytes(self.data[offset:offset + 2], byteorder='little')
+        return U16.unpack_from(self.data, self.position(offset))[0]
 
     def get_byte(self,offset):
         """Pull u8 from bytes"""
-        return self.data[offset]
+        return self.data[self.position(offset)]
 
 class Pa8(ByteStruct):
     """PLA Pokemon Format"""
     # pylint: disable=too-many-public-methods
     # pkxs contain a lot of information that may need to be accessed
+    __slots__ = ('blocks',)
     STOREDSIZE = 360
     BLOCKSIZE = 88
 
     def __init__(self,buf):
         ByteStruct.__init__(self,buf)
+        # start of each block in data, None while the blocks are in order
+        self.blocks = None
         if self.is_encrypted:
             self.decrypt()
 
+    @classmethod
+    def decode_batch(cls,buf,count,stride = STOREDSIZE):
+        """Decode count pokemon stored every stride bytes of buf, decrypting all of them as
+           one array, the returned pokemon are views of a single decrypted buffer"""
+        rows = np.frombuffer(buf, dtype=np.uint8, count=count*stride).reshape(count, stride)
+        encryption_constants = rows[:,:4].copy().view("<u4")[:,0].astype(np.uint64)
+        # a dtype view of a strided slice needs numpy 1.23, view a contiguous copy instead
+        words = np.ascontiguousarray(rows[:,8:cls.STOREDSIZE]).view("<u2")
+        encrypted = (words[:,(0x70 - 8) // 2] != 0) & (words[:,(0xC0 - 8) // 2] != 0)
+        multipliers, increments = cls.KEYSTREAM
+        keys = ((multipliers * encryption_constants[:,None] + increments)
+                >> np.uint64(16)).astype("<u2")
+        decrypted = rows.copy()
+        decrypted[:,8:cls.STOREDSIZE] = np.where(encrypted[:,None], words ^ keys, words) \
+            .view(np.uint8)
+        data = memoryview(decrypted.tobytes())
+        batch = []
+        for index in range(count):
+            pkm = cls.__new__(cls)
+            pkm.data = data[index*stride:(index + 1)*stride]
+            pkm.blocks = None
+            if encrypted[index]:
+                pkm.__shuffle__((int(encryption_constants[index]) >> 13) & 0x1F)
+            batch.append(pkm)
+        return batch
+
+    def position(self,offset):
+        """Position of a field's bytes in data, looked up through the block order"""
+        if self.blocks is None or offset < 8:
+            return offset
+        block, within = divmod(offset - 8, Pa8.BLOCKSIZE)
+        return self.blocks[block] + within
+
     @property
     def encryption_constant(self):
         """Pokemon's EC"""
@@ -90,12 +151,12 @@ class Pa8(ByteStruct):
     @property
     def evs(self):
         """Pokemon's EVs"""
-        return [self.data[0x26],
-                self.data[0x27],
-                self.data[0x28],
-                self.data[0x2A],
-                self.data[0x2B],
-                self.data[0x29]]
+        return [self.get_byte(0x26),
+                self.get_byte(0x27),
+                self.get_byte(0x28),
+                self.get_byte(0x2A),
+                self.get_byte(0x2B),
+                self.get_byte(0x29)]
 
     @property
     def move1(self):
@@ -135,11 +196,9 @@ class Pa8(ByteStruct):
 
     def calc_checksum(self):
         """Calculate the pokemons checksum for data validation"""
-        chk = 0
-        for i in range(8,Pa8.STOREDSIZE,2):
-            chk += self.get_ushort(i)
-            chk &= 0xFFFF
-        return chk
+        # a sum of every word does not depend on the order of the blocks
+        words = np.frombuffer(self.data, dtype="<u2", count=(Pa8.STOREDSIZE - 8) // 2, offset=8)
+        return int(words.sum(dtype=np.uint64)) & 0xFFFF
 
     @property
     def shiny_type(self):
@@ -177,23 +236,24 @@ class Pa8(ByteStruct):
         self.__crypt__(seed, 8, Pa8.STOREDSIZE)
 
     def __crypt__(self, seed, start, end):
-        """Encrypt/decrypt a based on seed"""
-        i = start
-        while i < end:
-            seed = seed * 0x41C64E6D + 0x6073
-            self.data[i] ^= (seed >> 16) & 0xFF
-            i += 1
-            self.data[i] ^= (seed >> 24) & 0xFF
-            i += 1
+        """Encrypt/decrypt a based on seed, xoring every word with its key at once"""
+        words = (end - start) // 2
+        multipliers, increments = Pa8.KEYSTREAM
+        keys = ((multipliers[:words] * np.uint64(seed) + increments[:words])
+                >> np.uint64(16)).astype("<u2")
+        # one copy of the buffer, xored in place
+        buf = bytearray(self.data)
+        crypted = np.frombuffer(buf, dtype="<u2", count=words, offset=start)
+        crypted ^= keys
+        self.data = memoryview(buf)
 
     def __shuffle__(self, shuffle_order):
-        """Shuffle the bytes"""
+        """Shuffle the bytes by looking each block up where it is stored instead of moving it"""
         idx = 4 * shuffle_order
-        sdata = bytearray(self.data[:])
-        for block in range(4):
-            ofs = Pa8.BLOCKPOSITION[idx + block]
-            self.data[8 + Pa8.BLOCKSIZE * block : 8 + Pa8.BLOCKSIZE * (block + 1)] \
-              = sdata[8 + Pa8.BLOCKSIZE * ofs : 8 + Pa8.BLOCKSIZE * (ofs + 1)]
+        self.blocks = tuple(8 + Pa8.BLOCKSIZE * Pa8.BLOCKPOSITION[idx + block]
+                            for block in range(4))
+
+    KEYSTREAM = lcg_keystream((STOREDSIZE - 8) // 2)
 
     BLOCKPOSITION = [
         0, 1, 2, 3,
@@ -0,0 +1,40 @@
+"""Least recently used caches of spawner search results, one per map"""
+from collections import OrderedDict
+import threading
+
+class ResultCache:
+    """Search results keyed by everything the search depends on, so an entry can only be
+       reused while the spawner's generator seed is unchanged"""
+    def __init__(self, maxsize = 8192):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default = None):
+        """Cached result for key, marking it as recently used"""
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        """Store a result, evicting the least recently used ones beyond maxsize"""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+# map name -> cache of that map's spawner results
+_caches = {}
+
+def map_cache(name):
+    """Result cache of a map"""
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches.setdefault(name, ResultCache())
+    return cache
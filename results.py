@@ -0,0 +1,40 @@
+"""Compact records of the pokemon found by searches or read from memory, serialised to json
+   once per response and rendered by map.html"""
+
+class PokemonResult:
+    """One pokemon and where it was found, fields that do not apply stay None and are left
+       out of the json"""
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    # one attribute per value shown to the user
+    __slots__ = ('ec', 'pid', 'ivs', 'ability', 'gender', 'nature', 'shiny',
+                 'alpha', 'slot', 'species', 'spawn', 'path', 'paths', 'advance')
+    # where the pokemon was found, set by keyword
+    CONTEXT = __slots__[7:]
+
+    def __init__(self, ec, pid, ivs, ability, gender, nature, shiny, **context):
+        self.ec = ec
+        self.pid = pid
+        self.ivs = ivs
+        self.ability = ability
+        self.gender = gender
+        self.nature = nature
+        # True/False for generated pokemon, the shiny type 0-2 for ones read from memory
+        self.shiny = shiny
+        for attribute in PokemonResult.CONTEXT:
+            setattr(self, attribute, context.pop(attribute, None))
+        if context:
+            raise TypeError(f"Unknown result fields {', '.join(context)}")
+
+    @classmethod
+    def from_info(cls, info, **context):
+        """Record of the information tuple returned by generate_from_seed"""
+        return cls(*info, **context)
+
+    def to_json(self):
+        """Json-able dict of every field that is set"""
+        record = {}
+        for attribute in PokemonResult.__slots__:
+            value = getattr(self, attribute)
+            if value is not None:
+                record[attribute] = value
+        return record
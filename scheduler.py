@@ -0,0 +1,79 @@
+"""Single owner of the connection to sys-botbase that runs queued commands in priority order"""
+from concurrent.futures import Future
+from itertools import count
+from queue import PriorityQueue
+import threading
+
+# lower values are run first, commands of the same class run in the order they were queued
+INTERACTIVE = 0
+BULK = 1
+
+# reads that can be answered by an identical read of the same priority that is already queued
+MERGEABLE = frozenset(('read', 'read_int', 'read_main', 'read_main_int',
+                       'read_pointer', 'read_pointer_int', 'read_pointer_multi',
+                       'read_absolute_multi'))
+
+class CommandScheduler:
+    """Runs every command on the reader from one thread, so requests handled in parallel by
+       flask can never interleave their commands and responses on the socket"""
+    def __init__(self, reader):
+        self.reader = reader
+        self.queue = PriorityQueue()
+        self.sequence = count()
+        # merge key -> future of a read that has been queued but not finished yet
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="sys-botbase", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Execute queued commands forever"""
+        while True:
+            _, _, key, future, method, args, kwargs = self.queue.get()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(getattr(self.reader, method)(*args, **kwargs))
+                except Exception as error: # pylint: disable=broad-except
+                    # handed to the caller waiting on the result
+                    future.set_exception(error)
+            if key is not None:
+                with self.lock:
+                    if self.pending.get(key) is future:
+                        del self.pending[key]
+
+    def submit(self, priority, method, *args, **kwargs):
+        """Queue a call to a reader method and return a future for its result"""
+        key = None
+        if method in MERGEABLE and kwargs.get('filename') is None:
+            # an interactive read must not wait on a merged bulk read queued behind other work
+            key = (priority, method, args, tuple(sorted(kwargs.items())))
+        with self.lock:
+            if key is None:
+                # reads queued after this command must not be answered by data read before it
+                self.pending.clear()
+            elif key in self.pending:
+                return self.pending[key]
+            future = Future()
+            if key is not None:
+                self.pending[key] = future
+            self.queue.put((priority, next(self.sequence), key, future, method, args, kwargs))
+        return future
+
+    def call(self, priority, method, *args, **kwargs):
+        """Run a reader method through the queue and wait for its result"""
+        return self.submit(priority, method, *args, **kwargs).result()
+
+    def client(self, priority):
+        """Reader-like object whose methods are queued at priority"""
+        return ScheduledReader(self, priority)
+
+class ScheduledReader:
+    """Stands in for NXReader, forwarding every method call to the scheduler"""
+    def __init__(self, scheduler, priority):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            return self.scheduler.call(self.priority, method, *args, **kwargs)
+        return call
@@ -0,0 +1,95 @@
+"""Index of the per map spawner slot tables"""
+from bisect import bisect_left
+from itertools import accumulate
+import json
+
+ANY_TIME = "Any Time"
+ALL_WEATHER = "All Weather"
+
+class SlotTable:
+    """Slot weights of a spawner for one time and weather"""
+    __slots__ = ('species', 'cumulative', 'total', 'ranges')
+
+    def __init__(self, values):
+        self.species = list(values.keys())
+        # running sums add left to right exactly like summing the weights in order does
+        self.cumulative = list(accumulate(values.values()))
+        self.total = self.cumulative[-1] if self.cumulative else 0
+        self.ranges = {}
+        start = 0
+        for species, end in zip(self.species, self.cumulative):
+            self.ranges[species] = (start, end, self.total)
+            start = end
+
+    def pokemon(self, slot):
+        """Species of the first slot whose cumulative weight reaches slot"""
+        index = bisect_left(self.cumulative, slot)
+        return self.species[index] if index < len(self.species) else None
+
+    def slot_range(self, species):
+        """Start, end and total weight of a species, all 0 if it cannot spawn"""
+        return self.ranges.get(species, (0, 0, 0))
+
+class SlotIndex:
+    """Slot tables of every spawner of a map keyed by (spawner name, time, weather)"""
+    __slots__ = ('sp_slots', 'spawners', 'tables')
+
+    def __init__(self, sp_slots):
+        self.sp_slots = sp_slots
+        # spawner name -> [(time, weather, table)] in file order, the first match wins
+        self.spawners = {name: [(*time_weather.split("/"), SlotTable(values))
+                                for time_weather, values in time_weathers.items()]
+                         for name, time_weathers in sp_slots.items()}
+        times = set()
+        weathers = set()
+        for entries in self.spawners.values():
+            for time, weather, _ in entries:
+                times.add(time)
+                weathers.add(weather)
+        times.discard(ANY_TIME)
+        weathers.discard(ALL_WEATHER)
+        self.tables = {}
+        for name in self.spawners:
+            for time in times:
+                for weather in weathers:
+                    self.tables[(name, time, weather)] = self.match(name, time, weather)
+
+    @classmethod
+    def from_file(cls, name):
+        """Build the index of a map from its slot json"""
+        with open(f"./static/resources/{name}.json",encoding="utf-8") as slot_file:
+            return cls(json.load(slot_file))
+
+    def match(self, name, time, weather):
+        """Scan a spawner's tables for the first one matching time and weather"""
+        for slot_time, slot_weather, table in self.spawners[name]:
+            if slot_time in (ANY_TIME, time) and slot_weather in (ALL_WEATHER, weather):
+                return table
+        return None
+
+    def table(self, name, time, weather):
+        """Slot table of a spawner for a time and weather, None if it has none"""
+        key = (name, time, weather)
+        if key not in self.tables:
+            self.tables[key] = self.match(name, time, weather)
+        return self.tables[key]
+
+    def pokemon(self, name, time, weather, slot):
+        """Species a slot value selects"""
+        table = self.table(name, time, weather)
+        return table.pokemon(slot) if table is not None else None
+
+    def slot_range(self, name, time, weather, species):
+        """Start, end and total weight of a species for a spawner"""
+        table = self.table(name, time, weather)
+        return table.slot_range(species) if table is not None else (0, 0, 0)
+
+# map name -> index, each map's slot json is only parsed once
+_indexes = {}
+
+def slot_index(name):
+    """Slot index of a map"""
+    index = _indexes.get(name)
+    if index is None:
+        index = _indexes[name] = SlotIndex.from_file(name)
+    return index
@@ -0,0 +1,7 @@
+"""Run the tests from the repository root, the modules load their resources relative to it"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
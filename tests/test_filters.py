@@ -0,0 +1,20 @@
+"""Tests of the filter compiled from the request json"""
+from filters import PokeFilter
+
+FILTER = {'slotTotal': 101, 'shinyFilterCheck': False, 'slotFilterCheck': False,
+          'minSlotFilter': 0, 'maxSlotFilter': 101, 'outbreakAlphaFilter': False}
+
+def test_empty_iv_boxes_do_not_bound():
+    """Empty iv boxes arrive as null and leave their iv unbounded"""
+    poke_filter = PokeFilter.from_json(dict(FILTER,
+                                            minIVs = [None, 31, None, 0, 0, 0],
+                                            maxIVs = [None, None, None, 31, 31, 31]))
+    assert poke_filter.min_ivs == (0, 31, 0, 0, 0, 0)
+    assert poke_filter.max_ivs is None
+    assert poke_filter.passes_ivs([5, 31, 0, 12, 30, 1])
+    assert not poke_filter.passes_ivs([5, 30, 0, 12, 30, 1])
+
+def test_all_iv_boxes_empty():
+    """A filter with only empty iv boxes checks no ivs at all"""
+    poke_filter = PokeFilter.from_json(dict(FILTER, minIVs = [None] * 6, maxIVs = [None] * 6))
+    assert poke_filter.min_ivs is None and poke_filter.max_ivs is None
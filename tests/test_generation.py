@@ -0,0 +1,44 @@
+"""Tests of the spawner searches"""
+from concurrent.futures import ProcessPoolExecutor
+import random
+from filters import PokeFilter
+from generation import check_spawners, search_spawners
+
+def random_spawners(count,poke_filter = PokeFilter(shiny = True)):
+    """(group_id,generator_seed,guaranteed_ivs,poke_filter) of count spawners"""
+    rng = random.Random(0)
+    return [(str(group_id),rng.getrandbits(64),rng.choice((0,3)),poke_filter)
+            for group_id in range(count)]
+
+def test_search_spawners_across_processes():
+    """Splitting the search across processes finds the same advances as one check_spawners"""
+    spawners = random_spawners(12)
+    expected = dict(check_spawners(spawners,1,False,2000))
+    with ProcessPoolExecutor(2) as executor:
+        found = dict(search_spawners(spawners,1,False,2000,executor,2))
+    assert found == expected
+
+def test_search_spawners_cancels_queued_chunks():
+    """Chunks still queued when the consumer stops are cancelled instead of left to run"""
+    # nothing passes, so every spawner is searched up to the stopping point
+    spawners = random_spawners(40,PokeFilter(shiny = True,min_ivs = (31,) * 6))
+    with ProcessPoolExecutor(1) as executor:
+        futures = []
+        submit = executor.submit
+        def recording_submit(*args):
+            futures.append(submit(*args))
+            return futures[-1]
+        executor.submit = recording_submit
+        search = search_spawners(spawners,1,False,20000,executor,3)
+        next(search)
+        search.close()
+        # 14 chunks, more than the pool takes on ahead of time
+        assert len(futures) == 14
+        assert any(future.cancelled() for future in futures)
+        for future in futures:
+            assert future.cancelled() or future.running() or future.done()
+
+def test_search_spawners_without_executor():
+    """The serial search yields every spawner"""
+    spawners = random_spawners(3)
+    assert dict(search_spawners(spawners,1,False,500)) == dict(check_spawners(spawners,1,False,500))
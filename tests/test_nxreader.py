@@ -0,0 +1,36 @@
+"""Tests of the sys-botbase connection"""
+import binascii
+import socket
+import pytest
+from nxreader import NXReader
+
+@pytest.fixture(name = "connection")
+def fixture_connection():
+    """NXReader connected to a local socket standing in for sys-botbase, and that socket"""
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        reader = NXReader("127.0.0.1", server.getsockname()[1], timeout = 0.2)
+        switch, _ = server.accept()
+    switch.recv(0x100) # configure
+    yield reader, switch
+    switch.close()
+    reader.socket.close()
+
+def test_timed_out_response_is_dropped(connection):
+    """The part of a response that arrived before a timeout is not read as the next one"""
+    reader, switch = connection
+    switch.sendall(b"0A0B")
+    with pytest.raises(TimeoutError):
+        reader.read(0, 4)
+    switch.sendall(b"0C0D\n")
+    assert reader.read(0, 2) == b"\x0c\x0d"
+
+def test_malformed_responses_are_consumed(connection):
+    """A response that cannot be parsed does not prefix the next one"""
+    reader, switch = connection
+    switch.sendall(b"not a pointer\n0000000000001234\nXY\n0E0F\n")
+    with pytest.raises(ValueError):
+        reader.resolve_pointer((0x10,))
+    assert reader.resolve_pointer((0x10,)) == 0x1234
+    with pytest.raises(binascii.Error):
+        reader.read(0, 1)
+    assert reader.read(0, 2) == b"\x0e\x0f"
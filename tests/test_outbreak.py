@@ -0,0 +1,43 @@
+"""Tests of the mass outbreak searches"""
+from concurrent.futures import ProcessPoolExecutor
+import outbreak
+from filters import PokeFilter
+from outbreak import generate_passive_search_paths, next_filtered_aggressive_outbreak_pathfind
+
+GROUP_SEED = 0x6B413EA98DDEA258
+
+def test_aggressive_search_gives_up_without_paths():
+    """A filter nothing passes stops at the search limit instead of searching forever"""
+    poke_filter = PokeFilter(shiny = True, min_ivs = (31,) * 6)
+    assert next_filtered_aggressive_outbreak_pathfind(GROUP_SEED,1,10,poke_filter,
+                                                      search_limit=20) == (20,None)
+
+def test_aggressive_search_without_advances(monkeypatch):
+    """Nothing searched is reported as no advances and no paths"""
+    monkeypatch.setattr(outbreak,"aggressive_advance_searches",lambda *args: iter(()))
+    assert next_filtered_aggressive_outbreak_pathfind(GROUP_SEED,1,10,PokeFilter()) == (0,None)
+
+def test_aggressive_search_finds_paths():
+    """Paths are returned cheapest first, grouped by advance"""
+    advance,results = next_filtered_aggressive_outbreak_pathfind(GROUP_SEED,26,10,
+                                                                 PokeFilter(shiny = True))
+    assert results
+    assert len(results) <= 10
+    assert [result.advance for result in results] == sorted(result.advance for result in results)
+    assert advance > results[-1].advance
+    assert all(result.shiny for result in results)
+
+def passive_json(filtered_results):
+    """Comparable form of a passive search's results, in their order"""
+    return [(seed,info.to_json(),filtered_results["paths"][seed])
+            for seed,info in filtered_results["info"].items()]
+
+def test_passive_search_across_processes():
+    """Splitting the passive search across processes gives the same results in the same order"""
+    poke_filter = PokeFilter(min_ivs = (10,) * 6)
+    serial = generate_passive_search_paths(GROUP_SEED,1,10,3,poke_filter,True)
+    with ProcessPoolExecutor(2) as executor:
+        parallel = generate_passive_search_paths(GROUP_SEED,1,10,3,poke_filter,True,
+                                                 executor=executor)
+    assert serial["info"]
+    assert passive_json(parallel) == passive_json(serial)
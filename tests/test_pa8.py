@@ -0,0 +1,46 @@
+"""Tests of the Pa8 decoding"""
+import random
+from pa8 import Pa8
+
+def random_pokemon(rng, encrypted):
+    """Stored bytes of a pokemon, left in the clear when not encrypted"""
+    data = bytearray(rng.randbytes(Pa8.STOREDSIZE))
+    if not encrypted:
+        data[0x70:0x72] = bytes(2)
+    return bytes(data)
+
+def test_decode_batch_matches_single_decode():
+    """Every pokemon of a batch decodes to the same fields as decoding it on its own"""
+    rng = random.Random(0)
+    stored = [random_pokemon(rng, index % 3 != 0) for index in range(7)]
+    batch = Pa8.decode_batch(b"".join(stored), len(stored))
+    assert len(batch) == len(stored)
+    for data, pkm in zip(stored, batch):
+        single = Pa8(data)
+        for offset in range(0, Pa8.STOREDSIZE, 2):
+            assert pkm.get_ushort(offset) == single.get_ushort(offset)
+        assert pkm.is_encrypted == single.is_encrypted
+        assert pkm.calc_checksum() == single.calc_checksum()
+        assert (pkm.species, pkm.pid, pkm.ivs) == (single.species, single.pid, single.ivs)
+
+def test_decode_batch_with_stride():
+    """Pokemon stored further apart than their size decode the same as packed ones"""
+    rng = random.Random(1)
+    stored = [random_pokemon(rng, True) for _ in range(3)]
+    padded = b"".join(data + bytes(8) for data in stored)
+    batch = Pa8.decode_batch(padded, len(stored), Pa8.STOREDSIZE + 8)
+    for data, pkm in zip(stored, batch):
+        assert bytes(pkm.data[:Pa8.STOREDSIZE]) == bytes(Pa8(data).data)
+
+def test_decrypt_matches_lcg():
+    """Decrypting xors every word after the header with the lcg seeded by the ec"""
+    data = random_pokemon(random.Random(2), True)
+    seed = int.from_bytes(data[:4], "little")
+    expected = bytearray(data)
+    for offset in range(8, Pa8.STOREDSIZE, 2):
+        seed = (seed * 0x41C64E6D + 0x6073) & 0xFFFFFFFF
+        word = int.from_bytes(data[offset:offset + 2], "little") ^ (seed >> 16)
+        expected[offset:offset + 2] = word.to_bytes(2, "little")
+    pkm = Pa8(data)
+    assert bytes(pkm.data) == bytes(expected)
+    assert bytes(Pa8.decode_batch(data, 1)[0].data) == bytes(expected)
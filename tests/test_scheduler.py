@@ -0,0 +1,44 @@
+"""Tests of the command scheduler"""
+import threading
+from scheduler import CommandScheduler, INTERACTIVE, BULK
+
+class FakeReader:
+    """Records the reads it is asked for, wait blocks until released"""
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def wait(self):
+        """Hold the scheduler thread so commands pile up in the queue"""
+        self.release.wait(10)
+
+    def read(self, address, size):
+        """Pretend read that only records its arguments"""
+        self.calls.append(address)
+        return bytes(size)
+
+def test_identical_reads_merge_within_a_priority():
+    """A read identical to a queued one of the same priority shares its future"""
+    reader = FakeReader()
+    scheduler = CommandScheduler(reader)
+    scheduler.submit(BULK, 'wait')
+    first = scheduler.submit(BULK, 'read', 1, 4)
+    second = scheduler.submit(BULK, 'read', 1, 4)
+    reader.release.set()
+    assert first is second
+    assert first.result(10) == bytes(4)
+    assert reader.calls == [1]
+
+def test_interactive_read_is_not_merged_into_bulk():
+    """An interactive read runs ahead of queued bulk work even when a bulk read matches it"""
+    reader = FakeReader()
+    scheduler = CommandScheduler(reader)
+    scheduler.submit(BULK, 'wait')
+    bulk = [scheduler.submit(BULK, 'read', address, 4) for address in (1, 2, 3)]
+    interactive = scheduler.submit(INTERACTIVE, 'read', 3, 4)
+    assert interactive is not bulk[2]
+    reader.release.set()
+    for future in bulk:
+        future.result(10)
+    assert interactive.result(10) == bytes(4)
+    assert reader.calls == [3, 1, 2, 3]
@@ -0,0 +1,74 @@
+"""Shared poller of the player's position pushed to every tracking client"""
+import json
+import threading
+
+class PositionTracker:
+    """Reads the player's position on one background thread while anyone is tracking it,
+       polling quickly while the player moves and backing off while they stand still"""
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, read_position, min_interval = 0.2, max_interval = 2.5, backoff = 1.5):
+        self.read_position = read_position
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.position = None
+        # bumped on every change so each client can tell which positions it has sent
+        self.version = 0
+        self.subscribers = 0
+        self.condition = threading.Condition()
+        self.wake_event = threading.Event()
+        self.thread = None
+
+    def run(self):
+        """Poll the position forever, sleeping while nobody is subscribed"""
+        interval = self.max_interval
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.subscribers)
+            try:
+                position = self.read_position()
+            except Exception as error: # pylint: disable=broad-except
+                # keep tracking through a failed read, just wait longer for the next one
+                print(f"Failed to read player position: {error}")
+                position = None
+            if position is not None and position != self.position:
+                with self.condition:
+                    self.position = position
+                    self.version += 1
+                    self.condition.notify_all()
+                interval = self.min_interval
+            else:
+                interval = min(self.max_interval, interval * self.backoff)
+            self.wake_event.wait(interval)
+            self.wake_event.clear()
+
+    def wake(self):
+        """Poll again right away, e.g. after a teleport"""
+        self.wake_event.set()
+
+    def updates(self, keepalive = 15):
+        """Yield each new position as a server-sent event, with a comment every keepalive
+           seconds without a change so disconnected clients are noticed"""
+        with self.condition:
+            self.subscribers += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="position", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+        self.wake()
+        version = 0
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.version != version, keepalive)
+                    changed = self.version != version
+                    version = self.version
+                    position = self.position
+                if changed:
+                    x, y, z = position
+                    yield f"data: {json.dumps({'x':x,'y':y,'z':z})}\n\n"
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            with self.condition:
+                self.subscribers -= 1
@@ -1,45 +1,74 @@
 """Xoroshiro Random Number Generator"""
+ULONGMASK = 2 ** 64 - 1
+
 class XOROSHIRO:
     """Xoroshiro Random Number Generator"""
-    ulongmask = 2 ** 64 - 1
+    __slots__ = ('seed0', 'seed1')
+    ulongmask = ULONGMASK
     uintmask = 2 ** 32 - 1
 
     def __init__(self, seed0, seed1 = 0x82A2B175229D6A5B):
-        self.seed = [seed0, seed1]
+        self.seed0 = seed0
+        self.seed1 = seed1
 
     def reseed(self, seed0, seed1 = 0x82A2B175229D6A5B):
         """Reseed rng without creating a new object"""
-        self.seed = [seed0, seed1]
+        self.seed0 = seed0
+        self.seed1 = seed1
+
+    @property
+    def seed(self):
+        """Return both words of the rng's state as a new list"""
+        return [self.seed0, self.seed1]
 
     @property
     def state(self):
         """Return the full state of the rng as read from memory"""
-        seed0, seed1 = self.seed
-        return seed0 | (seed1 << 64)
+        return self.seed0 | (self.seed1 << 64)
 
     @staticmethod
     def rotl(number, k):
         """Rotate number left by k"""
-        return ((number << k) | (number >> (64 - k))) & XOROSHIRO.ulongmask
+        return ((number << k) | (number >> (64 - k))) & ULONGMASK
 
     def next(self):
         """Generate the next random number and advance the rng"""
-        seed0, seed1 = self.seed
-        result = (seed0 + seed1) & XOROSHIRO.ulongmask
+        # rotl is inlined in the hot methods to avoid a call per step
+        seed0 = self.seed0
+        seed1 = self.seed1
+        result = (seed0 + seed1) & ULONGMASK
         seed1 ^= seed0
-        self.seed = [XOROSHIRO.rotl(seed0, 24) ^ seed1 ^ ((seed1 << 16) & XOROSHIRO.ulongmask),
-                     XOROSHIRO.rotl(seed1, 37)]
+        self.seed0 = ((seed0 << 24 | seed0 >> 40) ^ seed1 ^ (seed1 << 16)) & ULONGMASK
+        self.seed1 = (seed1 << 37 | seed1 >> 27) & ULONGMASK
         return result
 
+    def next_n(self, count):
+        """Generate the next count random numbers as a list and advance the rng"""
+        return self.fill([0] * count)
+
+    def fill(self, array):
+        """Fill a mutable sequence with the next random numbers and advance the rng"""
+        seed0 = self.seed0
+        seed1 = self.seed1
+        for i in range(len(array)):
+            array[i] = (seed0 + seed1) & ULONGMASK
+            seed1 ^= seed0
+            seed0 = ((seed0 << 24 | seed0 >> 40) ^ seed1 ^ (seed1 << 16)) & ULONGMASK
+            seed1 = (seed1 << 37 | seed1 >> 27) & ULONGMASK
+        self.seed0 = seed0
+        self.seed1 = seed1
+        return array
+
     def previous(self):
         """Generate the previous random number and advance the rng backwards"""
-        seed0, seed1 = self.seed
-        seed1 = XOROSHIRO.rotl(seed1, 27)
-        seed0 = (seed0 ^ seed1 ^ (seed1 << 16)) & XOROSHIRO.ulongmask
-        seed0 = XOROSHIRO.rotl(seed0, 40)
+        seed0 = self.seed0
+        seed1 = (self.seed1 << 27 | self.seed1 >> 37) & ULONGMASK
+        seed0 = (seed0 ^ seed1 ^ (seed1 << 16)) & ULONGMASK
+        seed0 = (seed0 << 40 | seed0 >> 24) & ULONGMASK
         seed1 ^= seed0
-        self.seed = [seed0,seed1]
-        return (seed0 + seed1) & XOROSHIRO.ulongmask
+        self.seed0 = seed0
+        self.seed1 = seed1
+        return (seed0 + seed1) & ULONGMASK
 
     def nextuint(self):
         """Generate the next random number as a uint"""
@@ -55,8 +84,22 @@ class XOROSHIRO:
 
     def rand(self, maximum = uintmask):
         """Generate a random number in the range of [0,maximum)"""
-        mask = XOROSHIRO.get_mask(maximum)
-        res = self.next() & mask
-        while res >= maximum:
-            res = self.next() & mask
-        return res
+        mask = XOROSHIRO.masks.get(maximum)
+        if mask is None:
+            mask = XOROSHIRO.get_mask(maximum)
+        seed0 = self.seed0
+        seed1 = self.seed1
+        while True:
+            result = (seed0 + seed1) & mask
+            seed1 ^= seed0
+            seed0 = ((seed0 << 24 | seed0 >> 40) ^ seed1 ^ (seed1 << 16)) & ULONGMASK
+            seed1 = (seed1 << 37 | seed1 >> 27) & ULONGMASK
+            if result < maximum:
+                break
+        self.seed0 = seed0
+        self.seed1 = seed1
+        return result
+
+# cached masks for the fixed ranges the game passes to rand
+XOROSHIRO.masks = {maximum: XOROSHIRO.get_mask(maximum)
+                   for maximum in (2, 6, 25, 32, 252, 0xFFFFFFFF)}
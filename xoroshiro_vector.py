@@ -0,0 +1,79 @@
+"""Vectorized Xoroshiro Random Number Generator"""
+import numpy as np
+
+class XOROSHIROVector:
+    """Xoroshiro Random Number Generator running many independent streams as numpy uint64 lanes"""
+    uintmask = 2 ** 32 - 1
+    default_seed1 = 0x82A2B175229D6A5B
+
+    def __init__(self, seed0, seed1 = default_seed1):
+        self.seed0 = np.array(seed0, dtype=np.uint64, ndmin=1)
+        self.seed1 = np.empty_like(self.seed0)
+        self.seed1[:] = seed1
+
+    def __len__(self):
+        return len(self.seed0)
+
+    def compress(self, keep):
+        """Drop every lane outside of the keep mask"""
+        self.seed0 = self.seed0[keep]
+        self.seed1 = self.seed1[keep]
+
+    @staticmethod
+    def rotl(number, k):
+        """Rotate every lane of number left by k"""
+        # numpy scalars keep every operation in uint64 instead of promoting to float64
+        return (number << np.uint64(k)) | (number >> np.uint64(64 - k))
+
+    def next(self, active = None):
+        """Generate the next random number of every lane and advance the rng,
+           lanes outside of the active mask are left untouched"""
+        seed0, seed1 = self.seed0, self.seed1
+        result = seed0 + seed1
+        seed1 = seed1 ^ seed0
+        new_seed0 = XOROSHIROVector.rotl(seed0, 24) ^ seed1 ^ (seed1 << np.uint64(16))
+        new_seed1 = XOROSHIROVector.rotl(seed1, 37)
+        if active is None:
+            self.seed0 = new_seed0
+            self.seed1 = new_seed1
+        else:
+            self.seed0 = np.where(active, new_seed0, seed0)
+            self.seed1 = np.where(active, new_seed1, self.seed1)
+        return result
+
+    def nextuint(self, active = None):
+        """Generate the next random number of every lane as a uint"""
+        return self.next(active) & np.uint64(XOROSHIROVector.uintmask)
+
+    @staticmethod
+    def get_mask(maximum):
+        """Get the bit mask for rand(maximum)"""
+        maximum -= 1
+        for i in range(6):
+            maximum |= maximum >> (1 << i)
+        return maximum
+
+    def rand(self, maximum = uintmask, active = None):
+        """Generate a random number in the range of [0,maximum) for every lane,
+           rerolling each lane on its own until it lands in range"""
+        mask = np.uint64(XOROSHIROVector.get_mask(maximum))
+        maximum = np.uint64(maximum)
+        pending = np.ones(len(self), dtype=bool) if active is None else active.copy()
+        result = np.zeros(len(self), dtype=np.uint64)
+        while pending.any():
+            draw = self.next(pending) & mask
+            result = np.where(pending, draw, result)
+            pending &= result >= maximum
+        return result
+
+def slot_values(slot_rands, slot_total):
+    """Scale raw slot rands to [0,slot_total) exactly as slot_total * rand / 2**64 does for
+       python ints and floats"""
+    if isinstance(slot_total, (int, np.integer)) and 0 <= slot_total < 2 ** 21:
+        # int * int is exact in python, so split the rand into halves small enough that
+        # each partial product fits in a double and round only once when summing them
+        slot_total = np.uint64(slot_total)
+        high = ((slot_rands >> np.uint64(32)) * slot_total).astype(np.float64)
+        low = ((slot_rands & np.uint64(0xFFFFFFFF)) * slot_total).astype(np.float64)
+        return (high * 2.0 ** 32 + low) / 2.0 ** 64
+    return slot_total * slot_rands.astype(np.float64) / 2.0 ** 64